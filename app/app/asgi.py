@@ -0,0 +1,23 @@
+"""
+ASGI config for app project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. API views run in a thread pool so that one process serves
+many requests waiting on the database at once, e.g. with
+``uvicorn app.asgi:application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
+"""
+
+import os
+
+import django
+
+from core.handlers import ThreadPoolASGIHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+django.setup(set_prefix=False)
+
+application = ThreadPoolASGIHandler()
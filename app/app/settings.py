@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -20,12 +22,16 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # See https://docs.djangoproject.com/en/2.1/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'uirssv#efe4atbpe2+^u8+a0%+pnvi%r)&y4(@*be7s1jmfq!s'
+SECRET_KEY = os.environ.get(
+    'SECRET_KEY', 'uirssv#efe4atbpe2+^u8+a0%+pnvi%r)&y4(@*be7s1jmfq!s'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.environ.get('ALLOWED_HOSTS', '').split(',') if host
+]
 
 
 # Application definition
@@ -39,12 +45,13 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',
-    'core',
-    'user',
-    'country'
+    'core.apps.CoreConfig',
+    'user.apps.UserConfig',
+    'country.apps.CountryConfig',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +63,17 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'app.urls'
 
+# Requests slower than this many seconds are logged with their slowest
+# queries by core.middleware.MetricsMiddleware
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', 1))
+
+# Besides staff users, /metrics is only served to scrapers sending
+# "Authorization: Bearer <METRICS_TOKEN>" or from METRICS_ALLOWED_IPS
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_ALLOWED_IPS = [
+    ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -80,14 +98,108 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # DB_POOL=1 shares a pool of connections between the threads of
+        # each process, sized by the POOL options below
+        'ENGINE': (
+            'core.backends.postgresql' if os.environ.get('DB_POOL') == '1'
+            else 'django.db.backends.postgresql'
+        ),
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Seconds a connection is kept for the next requests, 0 closes it
+        # at the end of each request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 0)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'IDLE_TIMEOUT': float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+            'ACQUIRE_TIMEOUT': float(
+                os.environ.get('DB_POOL_ACQUIRE_TIMEOUT', 30)
+            ),
+        },
     }
 }
 
+# Read replicas: DB_REPLICA_HOSTS=host1,host2 adds replica_1, replica_2
+# copies of the default database on those hosts. Safe requests on the
+# country viewsets read from them, see core.routers.
+for number, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    DATABASES[f'replica_{number}'] = dict(
+        DATABASES['default'], HOST=host, TEST={'MIRROR': 'default'}
+    )
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Seconds a user reads from the primary after writing, longer than the
+# replication lag. Pins are kept in the default cache.
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+# Seconds between checks that a kept connection still works, see
+# core.signals.check_connections. Unset disables the checks.
+DB_HEALTH_CHECK_INTERVAL = (
+    float(os.environ['DB_HEALTH_CHECK_INTERVAL'])
+    if os.environ.get('DB_HEALTH_CHECK_INTERVAL') else None
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# The in-process cache is only suitable for a single process, point
+# CACHE_BACKEND at a shared backend (e.g. django_redis.cache.RedisCache)
+# when running several workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'countries-api'),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+    }
+}
+
+# Resolved auth tokens are cached in process, and in the cache named by
+# TOKEN_CACHE_ALIAS when set so that workers share lookups.
+TOKEN_CACHE_TIMEOUT = int(os.environ.get('TOKEN_CACHE_TIMEOUT', 60))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', 10000))
+TOKEN_CACHE_ALIAS = os.environ.get('TOKEN_CACHE_ALIAS')
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/3.1/topics/auth/passwords/
+# PASSWORD_HASHER selects the preferred algorithm, the others stay listed
+# so existing passwords are verified and rehashed on the next login.
+# argon2 and bcrypt need the argon2-cffi and bcrypt packages.
+
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+
+if PASSWORD_HASHER not in _PASSWORD_HASHERS:
+    raise ImproperlyConfigured(
+        f'Unknown PASSWORD_HASHER {PASSWORD_HASHER!r}, expected one of: '
+        + ', '.join(sorted(_PASSWORD_HASHERS))
+    )
+
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 216000))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 512))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 2))
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
@@ -127,4 +239,27 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'country.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# JSON library of the renderer and parser: orjson, ujson or json (stdlib).
+# Defaults to the first one installed.
+JSON_BACKEND = os.environ.get('JSON_BACKEND') or None
+
+
 AUTH_USER_MODEL = 'core.User' # Set to the custom user model defined in Core.models.py
@@ -4,6 +4,8 @@ from django.utils.translation import gettext as _
 
 from core import models
 
+from country import summary
+
 
 class UserAdmin(BaseUserAdmin):
     ordering = ['id']
@@ -32,6 +34,16 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class PlaceLinkAdmin(admin.ModelAdmin):
+    '''Admin for countries and states, keeping place summaries in sync'''
+
+    def delete_model(self, request, obj):
+        summary.delete(type(obj).objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        summary.delete(queryset)
+
+
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Country)
-admin.site.register(models.State)
+admin.site.register(models.Country, PlaceLinkAdmin)
+admin.site.register(models.State, PlaceLinkAdmin)
@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    '''No connection was released in time by the other threads'''
+
+
+class ConnectionPool:
+    '''Thread safe pool of DB-API connections
+
+    Connections are created by the connect function passed to acquire(), up
+    to max_size at once, and waiting for a released one takes at most
+    acquire_timeout seconds. Idle connections are reused most recent first
+    and closed once unused for idle_timeout seconds, keeping min_size open.
+    '''
+
+    def __init__(self, min_size=0, max_size=10, idle_timeout=300,
+                 acquire_timeout=30):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError('Pool sizes must be 0 <= min <= max and max > 0')
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.pid = os.getpid()
+
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+
+        self.created = 0
+        self.closed = 0
+        self.acquired = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def acquire(self, connect):
+        '''Return an idle connection, or a new one while below max_size'''
+        with self._condition:
+            self._close_expired()
+            if not self._idle and self._size >= self.max_size:
+                self._wait()
+
+            self.acquired += 1
+            if self._idle:
+                return self._idle.pop()[0]
+            self._size += 1
+
+        try:
+            conn = connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self.created += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        '''Give a connection back to the pool, or close it if discarded'''
+        with self._condition:
+            if discard:
+                self._size -= 1
+                self.closed += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._close_expired()
+            self._condition.notify()
+
+        if discard:
+            self._close(conn)
+
+    def close_idle(self):
+        '''Close every idle connection'''
+        with self._condition:
+            idle = [conn for conn, released in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self.closed += len(idle)
+            self._condition.notify_all()
+
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self):
+        '''Return the size of the pool and counters of its use'''
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+                'created': self.created,
+                'closed': self.closed,
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'max_wait': self.max_wait,
+                'timeouts': self.timeouts,
+            }
+
+    def _wait(self):
+        # Called with the condition held, until a connection is released
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        self.waits += 1
+        try:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'No database connection available after '
+                        f'{self.acquire_timeout}s, all {self.max_size} are '
+                        f'in use'
+                    )
+                self._condition.wait(remaining)
+        finally:
+            waited = time.monotonic() - start
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def _close_expired(self):
+        # Oldest connections are at the left end of the deque
+        expired = []
+        limit = time.monotonic() - self.idle_timeout
+        while (self._idle and self._idle[0][1] < limit
+               and self._size > self.min_size):
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+            self.closed += 1
+
+        for conn in expired:
+            self._close(conn)
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, options):
+    '''Return the pool of a set of connection parameters in this process'''
+    with _pools_lock:
+        pool = _pools.get(key)
+        # A forked worker must not reuse the connections of its parent
+        if pool is None or pool.pid != os.getpid():
+            pool = _pools[key] = ConnectionPool(
+                min_size=options.get('MIN_SIZE', 0),
+                max_size=options.get('MAX_SIZE', 10),
+                idle_timeout=options.get('IDLE_TIMEOUT', 300),
+                acquire_timeout=options.get('ACQUIRE_TIMEOUT', 30),
+            )
+        return pool
+
+
+def all_pools():
+    '''Return the pools of this process by their key'''
+    with _pools_lock:
+        return {
+            key: pool for key, pool in _pools.items()
+            if pool.pid == os.getpid()
+        }
+
+
+class PooledDatabaseWrapperMixin:
+    '''Take connections from a pool and give them back when closed
+
+    The pool is configured by the POOL dict of the database settings, with
+    MIN_SIZE, MAX_SIZE, IDLE_TIMEOUT and ACQUIRE_TIMEOUT keys. Use it with
+    CONN_MAX_AGE = 0 so connections go back to the pool after each request.
+    '''
+
+    @property
+    def pool(self):
+        return get_pool(self.pool_key, self.settings_dict.get('POOL', {}))
+
+    @property
+    def pool_key(self):
+        # The parameters change when tests switch to the test database
+        return (self.alias, repr(sorted(self.get_connection_params().items())))
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        try:
+            return self.pool.acquire(lambda: connect(conn_params))
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def _close(self):
+        if self.connection is None:
+            return
+
+        conn, pool = self.connection, self.pool
+        # Connections closed inside a transaction, or after errors that
+        # left them unusable, are not handed to another thread
+        discard = self.in_atomic_block or (
+            self.errors_occurred and not self.is_usable()
+        )
+        if not discard:
+            try:
+                conn.rollback()
+            except self.Database.Error:
+                discard = True
+
+        pool.release(conn, discard=discard)
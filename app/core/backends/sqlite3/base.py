@@ -0,0 +1,7 @@
+from django.db.backends.sqlite3 import base
+
+from core.backends.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    '''SQLite backend with a connection pool, standing in for Postgres'''
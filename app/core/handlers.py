@@ -0,0 +1,102 @@
+from asgiref.sync import sync_to_async
+
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+
+from core.signals import check_connections
+
+
+class ThreadPoolASGIHandler(ASGIHandler):
+    '''ASGI handler running thread safe sync views in a thread pool
+
+    Django runs every sync view of an ASGI application in one shared thread,
+    so a slow query holds up all requests. Views marked run_in_thread_pool
+    run in the default executor of the event loop instead, and a single
+    process keeps as many of them in flight as the executor has threads.
+    Each of these threads uses its own database connections, closed,
+    checked or reused around every request as the request signals do for
+    the main thread.
+    '''
+
+    def make_view_atomic(self, view):
+        wrapped = super().make_view_atomic(view)
+        if not getattr(view, 'run_in_thread_pool', False):
+            return wrapped
+
+        # Rendering in the pool too keeps large responses off the shared
+        # thread, unless template response middleware must run first
+        render = not self._template_response_middleware
+
+        def run(request, *args, **kwargs):
+            close_old_connections()
+            check_connections()
+            try:
+                response = wrapped(request, *args, **kwargs)
+                if render and callable(getattr(response, 'render', None)):
+                    response.render()
+                return response
+            finally:
+                close_old_connections()
+
+        run = sync_to_async(run, thread_sensitive=False)
+
+        async def view_in_thread_pool(request, *args, **kwargs):
+            return await run(request, *args, **kwargs)
+
+        return view_in_thread_pool
+
+    async def send_response(self, response, send):
+        '''Send a response, reading streamed content off the event loop
+
+        Django iterates streaming responses on the event loop, where a
+        generator running queries raises SynchronousOnlyOperation. Parts are
+        read in the thread sync views run in instead, up to chunk_size bytes
+        per trip.
+        '''
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': self.response_headers(response),
+        })
+        parts = iter(response)
+        read = sync_to_async(self.read_parts, thread_sensitive=True)
+        done = False
+        while not done:
+            body, done = await read(parts)
+            if body:
+                await send({
+                    'type': 'http.response.body',
+                    'body': body,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    def read_parts(self, parts):
+        '''Return the next chunk_size bytes of parts and whether they ended'''
+        chunks, size = [], 0
+        for part in parts:
+            chunks.append(part)
+            size += len(part)
+            if size >= self.chunk_size:
+                return b''.join(chunks), False
+
+        return b''.join(chunks), True
+
+    def response_headers(self, response):
+        '''Return the headers and cookies of a response as ASGI pairs'''
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            value = cookie.output(header='').encode('ascii').strip()
+            headers.append((b'Set-Cookie', value))
+
+        return headers
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+# Password hashers whose cost is read from the settings, so that must_update
+# reports stored hashes made with another cost
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    '''PBKDF2 hasher using PASSWORD_PBKDF2_ITERATIONS'''
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS',
+                       hashers.PBKDF2PasswordHasher.iterations)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    '''Argon2 hasher using the PASSWORD_ARGON2_* settings'''
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_TIME_COST',
+                       hashers.Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_MEMORY_COST',
+                       hashers.Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'PASSWORD_ARGON2_PARALLELISM',
+                       hashers.Argon2PasswordHasher.parallelism)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    '''bcrypt hasher using PASSWORD_BCRYPT_ROUNDS'''
+
+    @property
+    def rounds(self):
+        return getattr(settings, 'PASSWORD_BCRYPT_ROUNDS',
+                       hashers.BCryptSHA256PasswordHasher.rounds)
@@ -0,0 +1,54 @@
+from django.conf import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+# Encoders tried in order when JSON_BACKEND is not set. Each dumps function
+# takes the data and a fallback for unsupported types and returns compact
+# UTF-8 bytes, keeping non-ASCII characters like the stdlib with
+# ensure_ascii=False.
+
+def _orjson_dumps(data, default):
+    return orjson.dumps(
+        data, default=default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+
+
+def _ujson_dumps(data, default):
+    return ujson.dumps(
+        data, default=default, ensure_ascii=False,
+        escape_forward_slashes=False
+    ).encode('utf-8')
+
+
+BACKENDS = {}
+if orjson is not None:
+    BACKENDS['orjson'] = (_orjson_dumps, orjson.loads)
+if ujson is not None:
+    BACKENDS['ujson'] = (_ujson_dumps, ujson.loads)
+
+
+def get_backend():
+    '''Return the name, dumps and loads of the fast JSON library in use
+
+    The JSON_BACKEND setting picks a library, 'json' forces the stdlib, and
+    the first installed library is used otherwise. The dumps and loads
+    functions are None when the stdlib is used.
+    '''
+    name = getattr(settings, 'JSON_BACKEND', None)
+    if name is None:
+        name = next(iter(BACKENDS), 'json')
+    if name == 'json':
+        return name, None, None
+
+    dumps, loads = BACKENDS[name]
+    return name, dumps, loads
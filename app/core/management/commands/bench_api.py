@@ -0,0 +1,301 @@
+import json
+import math
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import Client, override_settings
+
+from rest_framework.authtoken.models import Token
+
+from core import metrics
+from core.models import Country, State, Place
+
+from country.bulk import link_places
+
+
+EMAIL = 'bench-api-{}@example.com'
+PASSWORD = 'bench-password'
+
+SCENARIOS = ('country-list', 'place-list', 'place-detail', 'place-create',
+             'token')
+
+
+def percentile(values, percent):
+    '''Return the nearest-rank percentile of sorted values'''
+    if not values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class Command(BaseCommand):
+    '''Django command to measure the latency and throughput of the API'''
+    help = 'Seed data, load the API endpoints and compare to a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--countries', type=int, default=50,
+                            help='Countries per user')
+        parser.add_argument('--states', type=int, default=50,
+                            help='States per user')
+        parser.add_argument('--places', type=int, default=500,
+                            help='Places per user')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Requests in flight at once')
+        parser.add_argument('--scenario', action='append',
+                            choices=SCENARIOS,
+                            help='Scenario to run, defaults to all')
+        parser.add_argument('--url',
+                            help='Base URL of a running server to load over '
+                                 'HTTP instead of in-process')
+        parser.add_argument('--baseline',
+                            help='JSON file of results to compare to')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Write the results to --baseline')
+        parser.add_argument('--timings', action='store_true',
+                            help='Also compare latency and throughput, only '
+                                 'meaningful against a baseline recorded on '
+                                 'the same machine')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative regression of latency '
+                                 'and throughput with --timings')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the seeded data')
+
+    def handle(self, *args, **options):
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError('--save-baseline needs --baseline')
+
+        users = self.seed(options)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver', 'localhost',
+                                                  '127.0.0.1']):
+                results = {
+                    name: self.run(name, users, options)
+                    for name in options['scenario'] or SCENARIOS
+                }
+        finally:
+            if not options['keep']:
+                get_user_model().objects.filter(
+                    pk__in=[user['id'] for user in users]
+                ).delete()
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f'Saved baseline to {options["baseline"]}')
+        elif options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'],
+                         options['timings'])
+
+    def seed(self, options):
+        '''Create the users with their tokens, countries, states and places'''
+        start = time.perf_counter()
+        users = []
+        for i in range(max(options['users'], 1)):
+            email = EMAIL.format(i)
+            get_user_model().objects.filter(email=email).delete()
+            user = get_user_model().objects.create_user(email, PASSWORD)
+
+            for model, count in ((Country, options['countries']),
+                                 (State, options['states']),
+                                 (Place, options['places'])):
+                model.objects.bulk_create(
+                    model(user=user, name=f'{model.__name__} {n}')
+                    for n in range(count)
+                )
+
+            countries = list(Country.objects.filter(
+                user=user
+            ).values_list('id', flat=True))
+            states = list(State.objects.filter(
+                user=user
+            ).values_list('id', flat=True))
+            places = list(Place.objects.filter(
+                user=user
+            ).values_list('id', flat=True))
+            if countries:
+                link_places('country', (
+                    (place, countries[n % len(countries)])
+                    for n, place in enumerate(places)
+                ))
+
+            users.append({
+                'id': user.pk,
+                'email': email,
+                'token': Token.objects.create(user=user).key,
+                'countries': countries,
+                'states': states,
+                'places': places,
+            })
+
+        self.stdout.write(
+            f'Seeded {len(users)} users in '
+            f'{time.perf_counter() - start:.1f}s'
+        )
+        return users
+
+    def run(self, name, users, options):
+        '''Send the requests of a scenario and summarize them'''
+        send = self.send_http if options['url'] else self.send_local
+        requests = [
+            self.build(name, random.choice(users), n)
+            for n in range(options['requests'])
+        ]
+
+        def timed(request):
+            start = time.perf_counter()
+            with metrics.collect() as collected:
+                ok = send(request, options)
+            if not options['url']:
+                close_old_connections()
+            return time.perf_counter() - start, collected.queries, ok
+
+        # Warm the token and response caches of every user first, so that
+        # query counts do not depend on which users were picked
+        for user in users:
+            send(self.build(name, user, -1), options)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max(options['concurrency'], 1)) as pool:
+            samples = list(pool.map(timed, requests))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(duration for duration, queries, ok in samples)
+        result = {
+            'requests': len(samples),
+            'errors': sum(1 for duration, queries, ok in samples if not ok),
+            'rps': round(len(samples) / elapsed, 1) if samples else 0,
+            'p50_ms': self._ms(percentile(latencies, 50)),
+            'p95_ms': self._ms(percentile(latencies, 95)),
+            'p99_ms': self._ms(percentile(latencies, 99)),
+            # Only queries of in-process requests are seen
+            'queries': (
+                None if options['url'] or not samples
+                else round(sum(q for d, q, ok in samples) / len(samples), 1)
+            ),
+        }
+
+        self.stdout.write(
+            f'{name}: {result["rps"]} requests/s, '
+            f'p50 {result["p50_ms"]} ms, p95 {result["p95_ms"]} ms, '
+            f'p99 {result["p99_ms"]} ms, '
+            f'{result["queries"]} queries/request, '
+            f'{result["errors"]} errors'
+        )
+        return result
+
+    def build(self, name, user, number):
+        '''Return the method, path, body and headers of a request'''
+        auth = {'Authorization': f'Token {user["token"]}'}
+        if name == 'country-list':
+            return 'GET', '/api/country/country/', None, auth
+        if name == 'place-list':
+            return 'GET', '/api/country/place/', None, auth
+        if name == 'place-detail':
+            place = random.choice(user['places'] or [0])
+            return 'GET', f'/api/country/place/{place}/', None, auth
+        if name == 'place-create':
+            body = {'name': f'Bench place {number}',
+                    'country': user['countries'][:1],
+                    'state': user['states'][:1]}
+            return 'POST', '/api/country/place/', body, auth
+        body = {'email': user['email'], 'password': PASSWORD}
+        return 'POST', '/api/user/token/', body, {}
+
+    def send_local(self, request, options):
+        method, path, body, headers = request
+        extra = {
+            f'HTTP_{key.upper()}': value for key, value in headers.items()
+        }
+        client = Client()
+        if method == 'GET':
+            response = client.get(path, **extra)
+        else:
+            response = client.post(path, json.dumps(body),
+                                   content_type='application/json', **extra)
+        return response.status_code < 400
+
+    def send_http(self, request, options):
+        method, path, body, headers = request
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers = dict(headers, **{'Content-Type': 'application/json'})
+        http_request = urllib.request.Request(
+            options['url'].rstrip('/') + path, data=data, headers=headers,
+            method=method
+        )
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                response.read()
+                return response.status < 400
+        except urllib.error.URLError:
+            return False
+
+    def compare(self, results, path, tolerance, timings=False):
+        '''Fail when results regressed from the baseline
+
+        Only query counts and errors are compared by default, timings
+        depend on the machine and are compared with --timings.
+        '''
+        with open(path) as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for name, result in results.items():
+            expected = baseline.get(name)
+            if expected is None:
+                continue
+            if timings:
+                regressions += self._timing_regressions(
+                    name, result, expected, tolerance
+                )
+            # Query counts do not depend on the machine, any rise counts
+            if (result['queries'] is not None
+                    and expected.get('queries') is not None
+                    and result['queries'] > expected['queries']):
+                regressions.append(
+                    f'{name} queries {result["queries"]} > '
+                    f'{expected["queries"]}'
+                )
+            if result['errors']:
+                regressions.append(f'{name} had {result["errors"]} errors')
+
+        if regressions:
+            raise CommandError(
+                'Regressions from the baseline:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write('No regression from the baseline')
+
+    def _timing_regressions(self, name, result, expected, tolerance):
+        if 'rps' not in expected:
+            raise CommandError(
+                f'The baseline has no timings for {name}, record one on this '
+                'machine with --save-baseline'
+            )
+
+        regressions = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if result[key] > expected[key] * (1 + tolerance):
+                regressions.append(
+                    f'{name} {key} {result[key]} > {expected[key]}'
+                )
+        if result['rps'] < expected['rps'] * (1 - tolerance):
+            regressions.append(
+                f'{name} rps {result["rps"]} < {expected["rps"]}'
+            )
+
+        return regressions
+
+    def _ms(self, seconds):
+        return None if seconds is None else round(seconds * 1000, 2)
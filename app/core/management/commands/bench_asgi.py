@@ -0,0 +1,149 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory, override_settings
+
+from rest_framework.authtoken.models import Token
+
+from core.handlers import ThreadPoolASGIHandler
+from core.models import Place
+
+
+EMAIL = 'bench-asgi@example.com'
+
+
+class Command(BaseCommand):
+    '''Django command to compare requests/s of the WSGI and ASGI handlers'''
+    help = 'Load test the place list through the WSGI and ASGI handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests to issue per handler')
+        parser.add_argument('--concurrency', type=int, default=20,
+                            help='Requests kept in flight on ASGI')
+        parser.add_argument('--latency', type=float, default=5,
+                            help='Milliseconds added to every query, to '
+                                 'stand for a remote database')
+        parser.add_argument('--rows', type=int, default=100,
+                            help='Places in the listing')
+        parser.add_argument('--path', default='/api/country/place/')
+
+    def handle(self, *args, **options):
+        get_user_model().objects.filter(email=EMAIL).delete()
+        user = get_user_model().objects.create_user(EMAIL)
+        try:
+            Place.objects.bulk_create(
+                Place(user=user, name=f'Place {i}')
+                for i in range(options['rows'])
+            )
+            headers = {
+                'authorization': f'Token {Token.objects.create(user=user)}'
+            }
+
+            latency = options['latency'] / 1000
+            with self.query_latency(latency), \
+                    override_settings(ALLOWED_HOSTS=['testserver']):
+                for name, run in (('wsgi', self.run_wsgi),
+                                  ('asgi', self.run_asgi)):
+                    start = time.perf_counter()
+                    run(options, headers)
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f'{name}: {options["requests"] / elapsed:.1f} '
+                        f'requests/s'
+                    )
+        finally:
+            user.delete()
+
+    def run_wsgi(self, options, headers):
+        '''Issue the requests one after another, like a sync worker'''
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        extra = {
+            f'HTTP_{key.upper()}': value for key, value in headers.items()
+        }
+
+        for i in range(options['requests']):
+            environ = factory.get(options['path'], **extra).environ
+            status = []
+            response = handler(environ, lambda s, h: status.append(s))
+            b''.join(response)
+            response.close()
+            self._check(int(status[0].split()[0]))
+
+    def run_asgi(self, options, headers):
+        '''Issue the requests with up to --concurrency in flight'''
+        handler = ThreadPoolASGIHandler()
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': options['path'],
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (key.encode(), value.encode())
+                for key, value in headers.items()
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+
+        async def request(semaphore):
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            async with semaphore:
+                await handler(dict(scope), receive, send)
+            self._check(messages[0]['status'])
+
+        async def main():
+            semaphore = asyncio.Semaphore(max(options['concurrency'], 1))
+            await asyncio.gather(*(
+                request(semaphore) for i in range(options['requests'])
+            ))
+
+        asyncio.run(main())
+
+    @contextmanager
+    def query_latency(self, latency):
+        '''Delay every query of the connections of all threads'''
+        def delay(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            if delay not in connection.execute_wrappers:
+                connection.execute_wrappers.append(delay)
+
+        if latency <= 0:
+            yield
+            return
+
+        connection_created.connect(add_delay, weak=False)
+        for connection in connections.all():
+            add_delay(None, connection)
+        try:
+            yield
+        finally:
+            connection_created.disconnect(add_delay)
+            for connection in connections.all():
+                if delay in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(delay)
+
+    def _check(self, status):
+        if status != 200:
+            raise CommandError(f'Request failed with status {status}')
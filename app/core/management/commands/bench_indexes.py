@@ -0,0 +1,119 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Country, State, Place
+
+
+class Command(BaseCommand):
+    '''Django command to show the query plans of the per-user listings'''
+    help = 'Seed a large dataset and print EXPLAIN plans of list queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000,
+                            help='Rows to create in each table')
+        parser.add_argument('--users', type=int, default=100,
+                            help='Number of users the rows are spread over')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the seeded rows instead of rolling '
+                                 'them back')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users = self.seed(options)
+            self.explain(users[0])
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def seed(self, options):
+        '''Create the users, countries, states and places'''
+        rows, batch_size = options['rows'], options['batch_size']
+        users = [
+            get_user_model().objects.create_user(f'bench{i}@example.com')
+            for i in range(max(options['users'], 1))
+        ]
+
+        start = time.perf_counter()
+        for model in (Country, State, Place):
+            objs = (
+                model(user=users[i % len(users)], name=f'{model.__name__} {i}')
+                for i in range(rows)
+            )
+            self._bulk_create(model, objs, batch_size)
+
+        # Link each place to one country and state of the same user
+        for field in ('country', 'state'):
+            through = getattr(Place, field).through
+            self._bulk_create(through, self._links(field), batch_size)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'Seeded {rows} rows per table in {elapsed:.1f}s')
+
+        return users
+
+    def explain(self, user):
+        '''Print the plan and timing of each list query'''
+        country = Country.objects.filter(user=user).first()
+        queries = {
+            'country list': Country.objects.filter(
+                user=user
+            ).order_by('-name', 'id'),
+            'state list': State.objects.filter(
+                user=user
+            ).order_by('-name', 'id'),
+            'place list': Place.objects.filter(user=user).order_by('-id'),
+            'places in country': Place.objects.filter(
+                user=user, country=country
+            ).order_by('-id'),
+        }
+
+        for label, queryset in queries.items():
+            queryset = queryset[:100]
+            plan = queryset.explain()
+
+            start = time.perf_counter()
+            list(queryset)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{label} ({elapsed:.2f} ms)'
+            ))
+            self.stdout.write(plan)
+
+    def _bulk_create(self, model, objs, batch_size):
+        batch = []
+        for obj in objs:
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                model.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+
+    def _links(self, field):
+        '''Yield through rows linking places to a row of the same user'''
+        model = Place._meta.get_field(field).related_model
+        through = getattr(Place, field).through
+        ids = self._ids_by_user(model)
+
+        rows = Place.objects.values_list('id', 'user_id').iterator()
+        for i, (place_id, user_id) in enumerate(rows):
+            choices = ids[user_id]
+            yield through(**{
+                'place_id': place_id,
+                f'{field}_id': choices[i % len(choices)],
+            })
+
+    def _ids_by_user(self, model):
+        ids = {}
+        for pk, user_id in model.objects.values_list('id', 'user_id'):
+            ids.setdefault(user_id, []).append(pk)
+
+        return ids
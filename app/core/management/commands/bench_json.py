@@ -0,0 +1,96 @@
+import io
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.json_backends import BACKENDS
+from core.models import Country, State, Place
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+from country.bulk import link_places
+from country.serializers import PlaceDetailSerializer
+
+
+class Command(BaseCommand):
+    '''Django command to compare the JSON renderers and parsers'''
+    help = 'Benchmark rendering and parsing the detail of many places'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000,
+                            help='Places to render')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options['rows'])
+            data = PlaceDetailSerializer(
+                Place.objects.filter(user=user).order_by('id'),
+                many=True
+            ).data
+            transaction.set_rollback(True)
+
+        repeat = options['repeat']
+        expected = JSONRenderer().render(data)
+        self.stdout.write(f'{len(data)} places, {len(expected)} bytes')
+
+        render_time, _ = self._best(
+            lambda: JSONRenderer().render(data), repeat
+        )
+        parse_time, _ = self._best(
+            lambda: JSONParser().parse(io.BytesIO(expected)), repeat
+        )
+        self.report('json', render_time, parse_time, True)
+
+        for name in BACKENDS:
+            with override_settings(JSON_BACKEND=name):
+                render_time, body = self._best(
+                    lambda: FastJSONRenderer().render(data), repeat
+                )
+                parse_time, _ = self._best(
+                    lambda: FastJSONParser().parse(io.BytesIO(expected)),
+                    repeat
+                )
+            self.report(name, render_time, parse_time, body == expected)
+
+    def seed(self, rows):
+        '''Create a user with places linked to countries and states'''
+        user = get_user_model().objects.create_user('bench@example.com')
+        for model in (Country, State, Place):
+            model.objects.bulk_create(
+                model(user=user, name=f'{model.__name__} {i}')
+                for i in range(rows)
+            )
+
+        place_ids = list(Place.objects.filter(user=user).values_list(
+            'id', flat=True
+        ))
+        for model in (Country, State):
+            related_ids = model.objects.filter(user=user).values_list(
+                'id', flat=True
+            )
+            link_places(model._meta.model_name, zip(place_ids, related_ids))
+
+        return user
+
+    def report(self, name, render_time, parse_time, same):
+        self.stdout.write(
+            f'{name}: render {render_time * 1000:.1f} ms, '
+            f'parse {parse_time * 1000:.1f} ms, identical output: {same}'
+        )
+
+    def _best(self, func, repeat):
+        best, result = None, None
+        for i in range(max(repeat, 1)):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best, result
@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+
+from rest_framework.test import APIRequestFactory
+
+from user.views import CreateTokenView
+
+
+HASHERS = {
+    'pbkdf2': ('core.hashers.PBKDF2PasswordHasher', None),
+    'argon2': ('core.hashers.Argon2PasswordHasher', 'argon2'),
+    'bcrypt': ('core.hashers.BCryptSHA256PasswordHasher', 'bcrypt'),
+}
+
+
+class Command(BaseCommand):
+    '''Django command to measure token logins per second per hasher'''
+    help = 'Benchmark the token endpoint with each password hasher'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Logins to issue per hasher')
+        parser.add_argument('--hasher', action='append',
+                            choices=sorted(HASHERS),
+                            help='Hasher to benchmark, defaults to all '
+                                 'installed ones')
+
+    def handle(self, *args, **options):
+        view = CreateTokenView.as_view()
+        factory = APIRequestFactory()
+
+        for name in options['hasher'] or sorted(HASHERS):
+            path, library = HASHERS[name]
+            if library and not self._installed(library):
+                self.stdout.write(f'{name}: skipped, {library} not installed')
+                continue
+
+            with override_settings(PASSWORD_HASHERS=[path]), \
+                    transaction.atomic():
+                email = f'bench-{name}@example.com'
+                get_user_model().objects.create_user(email, 'password')
+
+                start = time.perf_counter()
+                for i in range(options['requests']):
+                    request = factory.post(
+                        '/api/user/token/',
+                        {'email': email, 'password': 'password'}
+                    )
+                    response = view(request)
+                    if response.status_code != 200:
+                        raise CommandError(f'Login failed: {response.data}')
+                elapsed = time.perf_counter() - start
+
+                transaction.set_rollback(True)
+
+            # Requests run one at a time, so this is the rate of one core
+            self.stdout.write(
+                f'{name}: {options["requests"] / elapsed:.1f} tokens/s '
+                f'per core ({elapsed * 1000 / options["requests"]:.1f} ms '
+                f'per login)'
+            )
+
+    def _installed(self, library):
+        try:
+            __import__(library)
+        except ImportError:
+            return False
+        return True
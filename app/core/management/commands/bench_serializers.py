@@ -0,0 +1,98 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Country, State, Place
+
+from country import serializers
+from country.bulk import link_places
+
+
+class Command(BaseCommand):
+    '''Django command to compare the model and fast list serializers'''
+    help = 'Benchmark list serialization of countries and places'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000,
+                            help='Countries and places to serialize')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options['rows'])
+            countries = Country.objects.filter(user=user).order_by('id')
+            places = Place.objects.filter(user=user).order_by('id')
+
+            self.compare(
+                'countries',
+                lambda: serializers.CountrySerializer(
+                    countries, many=True
+                ).data,
+                lambda: serializers.CountryValuesListSerializer(
+                    countries.values_list('id', 'name', named=True)
+                ).data,
+                options['repeat']
+            )
+            self.compare(
+                'places',
+                lambda: serializers.PlaceSerializer(places, many=True).data,
+                lambda: serializers.PlaceValuesListSerializer(
+                    places.values_list('id', 'name', 'country_ids',
+                                       'state_ids', named=True)
+                ).data,
+                options['repeat']
+            )
+
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        '''Create a user with countries, states and linked places'''
+        user = get_user_model().objects.create_user('bench@example.com')
+        Country.objects.bulk_create(
+            Country(user=user, name=f'Country {i}') for i in range(rows)
+        )
+        State.objects.bulk_create(
+            State(user=user, name=f'State {i}') for i in range(rows)
+        )
+        Place.objects.bulk_create(
+            Place(user=user, name=f'Place {i}') for i in range(rows)
+        )
+
+        country_ids = list(Country.objects.filter(
+            user=user
+        ).values_list('id', flat=True))
+        state_ids = list(State.objects.filter(
+            user=user
+        ).values_list('id', flat=True))
+        place_ids = Place.objects.filter(user=user).values_list(
+            'id', flat=True
+        )
+        link_places('country', zip(place_ids, country_ids))
+        link_places('state', zip(place_ids, state_ids))
+
+        return user
+
+    def compare(self, label, model_path, fast_path, repeat):
+        '''Print the best time of both serializers and check their output'''
+        model_time, model_data = self._best(model_path, repeat)
+        fast_time, fast_data = self._best(fast_path, repeat)
+        same = [dict(item) for item in model_data] == list(fast_data)
+
+        self.stdout.write(
+            f'{label}: model serializer {model_time * 1000:.1f} ms, '
+            f'values serializer {fast_time * 1000:.1f} ms '
+            f'({model_time / max(fast_time, 1e-9):.1f}x), '
+            f'identical output: {same}'
+        )
+
+    def _best(self, func, repeat):
+        best, data = None, None
+        for i in range(max(repeat, 1)):
+            start = time.perf_counter()
+            data = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best, data
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from country import export
+
+
+class Command(BaseCommand):
+    '''Django command to export the places of a user'''
+    help = 'Stream the countries, states and places of a user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user to export')
+        parser.add_argument('--format', choices=('ndjson', 'csv'),
+                            default='ndjson')
+        parser.add_argument('--output', help='File to write, defaults to '
+                                             'standard output')
+        parser.add_argument('--chunk-size', type=int,
+                            default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        records = export.iter_records(user, options['chunk_size'])
+        if options['format'] == 'csv':
+            lines = export.csv_lines(records)
+        else:
+            lines = export.ndjson_lines(records)
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
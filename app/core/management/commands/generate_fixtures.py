@@ -0,0 +1,159 @@
+import itertools
+import random
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+
+from core.models import Country, State, Place
+
+from country.importer import GeodataImporter
+
+
+SYLLABLES = (
+    'a', 'ba', 'da', 'de', 'di', 'fa', 'ga', 'ha', 'ja', 'ka', 'ko', 'la',
+    'le', 'lo', 'ma', 'mi', 'na', 'ne', 'no', 'o', 'ra', 're', 'ri', 'sa',
+    'se', 'so', 'ta', 'te', 'to', 'u', 'wa', 'ya', 'yo', 'za',
+)
+
+
+def zipf_weights(count, skew):
+    '''Return the Zipf weights of ranks 1 to count'''
+    return [1 / rank ** skew for rank in range(1, count + 1)]
+
+
+def zipf_split(total, count, skew):
+    '''Split total into count parts following a Zipf law, exactly'''
+    weights = zipf_weights(count, skew)
+    scale = total / sum(weights)
+    parts = [int(weight * scale) for weight in weights]
+    # The rounding remainder goes to the highest ranks
+    for rank in range(total - sum(parts)):
+        parts[rank % count] += 1
+    return parts
+
+
+class Command(BaseCommand):
+    '''Django command to generate large, skewed and reproducible data'''
+    help = 'Create users owning Zipf distributed countries, states and places'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--countries', type=int, default=10000,
+                            help='Countries over all users')
+        parser.add_argument('--states', type=int, default=100000,
+                            help='States over all users')
+        parser.add_argument('--places', type=int, default=1000000,
+                            help='Places over all users')
+        parser.add_argument('--max-links', type=int, default=3,
+                            help='Most countries and states of a place')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Zipf exponent of the distributions')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--email-prefix', default='fixture')
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete the users of an earlier run first, '
+                                 'without bumping their cache versions')
+
+    def handle(self, *args, **options):
+        users = max(options['users'], 1)
+        emails = [f'{options["email_prefix"]}{i}@example.com'
+                  for i in range(users)]
+        existing = get_user_model().objects.filter(email__in=emails)
+        if existing.exists():
+            if not options['replace']:
+                raise CommandError('Fixture users already exist, use '
+                                   '--replace to generate them again')
+            self.delete(existing)
+
+        rng = random.Random(options['seed'])
+        skew = options['skew']
+        splits = {
+            option: zipf_split(options[option], users, skew)
+            for option in ('countries', 'states', 'places')
+        }
+
+        start = time.perf_counter()
+        created = Counter()
+        for i, email in enumerate(emails):
+            user = get_user_model().objects.create_user(email)
+            records = self.records(
+                rng, splits['countries'][i], splits['states'][i],
+                splits['places'][i], options['max_links'], skew
+            )
+            importer = GeodataImporter(user, options['batch_size'])
+            with transaction.atomic():
+                created.update(importer.load(records))
+        elapsed = time.perf_counter() - start
+
+        for kind, count in sorted(created.items()):
+            self.stdout.write(f'{kind}: {count} rows created')
+        total = sum(created.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {total} rows for {users} users in {elapsed:.2f}s '
+            f'({total / max(elapsed, 1e-9):.0f} rows/s)'
+        ))
+
+    def delete(self, users):
+        '''Delete users with their rows, without loading every row'''
+        ids = list(users.values_list('id', flat=True))
+        if not ids:
+            return
+        for field in ('country', 'state'):
+            getattr(Place, field).through.objects.filter(
+                place__user_id__in=ids
+            ).delete()
+        # Plain DELETEs skip loading every row to send the per row delete
+        # signals. Those would only bump the cache versions of users about
+        # to be deleted, so the version caches are not bumped here.
+        for model in (Place, Country, State):
+            connection = connections[router.db_for_write(model)]
+            quote = connection.ops.quote_name
+            placeholders = ', '.join(['%s'] * len(ids))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {quote(model._meta.db_table)} '
+                    f'WHERE {quote(model._meta.get_field("user").column)} '
+                    f'IN ({placeholders})', ids
+                )
+        users.delete()
+
+    def records(self, rng, countries, states, places, max_links, skew):
+        '''Yield the records of one user in the import format
+
+        Countries and states are ranked by popularity: low ids are linked
+        to most places, and most places have a single link of each kind.
+        '''
+        for kind, count in (('country', countries), ('state', states)):
+            for pk in range(1, count + 1):
+                yield {'type': kind, 'id': pk, 'name': self.name(rng, pk),
+                       'country': [], 'state': []}
+
+        link_counts = range(1, max(max_links, 1) + 1)
+        link_weights = list(itertools.accumulate(
+            zipf_weights(len(link_counts), skew)
+        ))
+        related = {
+            'country': (range(1, countries + 1), list(itertools.accumulate(
+                zipf_weights(countries, skew)
+            ))),
+            'state': (range(1, states + 1), list(itertools.accumulate(
+                zipf_weights(states, skew)
+            ))),
+        }
+        for pk in range(1, places + 1):
+            record = {'type': 'place', 'id': pk, 'name': self.name(rng, pk)}
+            for field, (ids, weights) in related.items():
+                links = rng.choices(link_counts, cum_weights=link_weights)[0]
+                record[field] = sorted(set(
+                    rng.choices(ids, cum_weights=weights, k=links)
+                )) if ids else []
+            yield record
+
+    def name(self, rng, number):
+        '''Return a made up name, unique thanks to its number'''
+        word = ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+        return f'{word.capitalize()} {number}'
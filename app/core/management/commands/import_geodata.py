@@ -0,0 +1,45 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from country.importer import GeodataError, GeodataImporter, read_records
+
+
+class Command(BaseCommand):
+    '''Django command to load countries, states and places from files'''
+    help = 'Import NDJSON or CSV files in the export format for a user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+',
+                            help='.ndjson or .csv files, loaded in order')
+        parser.add_argument('--email', required=True,
+                            help='Email of the user owning the rows')
+        parser.add_argument('--type', choices=GeodataImporter.types,
+                            help='Type of records without a type column')
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        importer = GeodataImporter(user, batch_size=options['batch_size'])
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                for path in options['files']:
+                    importer.load(read_records(path, options['type']))
+        except (GeodataError, OSError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - start
+
+        for kind, count in sorted(importer.created.items()):
+            self.stdout.write(f'{kind}: {count} rows created')
+        total = sum(importer.created.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {total} rows in {elapsed:.2f}s '
+            f'({total / max(elapsed, 1e-9):.0f} rows/s)'
+        ))
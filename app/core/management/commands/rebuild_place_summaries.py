@@ -0,0 +1,43 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Place
+
+from country import summary
+from country.cache import bump_version
+
+
+class Command(BaseCommand):
+    '''Django command to recompute the link summaries of places'''
+    help = 'Rebuild the country and state summary columns of places'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email',
+                            help='Only rebuild the places of this user')
+        parser.add_argument('--batch-size', type=int,
+                            default=summary.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        places = Place.objects.all()
+        if options['email']:
+            try:
+                user = get_user_model().objects.get(email=options['email'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'No user with email {options["email"]}')
+            places = places.filter(user=user)
+
+        start = time.perf_counter()
+        count = summary.rebuild(places, options['batch_size'])
+        elapsed = time.perf_counter() - start
+
+        # Cached responses may have been built from stale summaries
+        user_ids = places.order_by().values_list('user_id', flat=True)
+        for user_id in user_ids.distinct():
+            bump_version(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} places in {elapsed:.2f}s '
+            f'({count / max(elapsed, 1e-9):.0f} places/s)'
+        ))
@@ -0,0 +1,302 @@
+import heapq
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from core.backends.pool import all_pools
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        '%s="%s"' % (name, _escape(value))
+        for name, value in zip(names, values)
+    )
+    return '{%s}' % pairs
+
+
+class Counter:
+    '''Prometheus counter with labels'''
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, self.labels, key, value
+
+
+class Gauge(Counter):
+    '''Prometheus gauge with labels'''
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Counter):
+    '''Prometheus histogram with labels and cumulative buckets'''
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # One count per bucket, then +Inf, then the sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {
+                key: list(counts) for key, counts in self._values.items()
+            }
+        names = self.labels + ('le',)
+        for key, counts in sorted(values.items()):
+            for bound, count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket', names, key + (bound,), count
+            yield f'{self.name}_bucket', names, key + ('+Inf',), counts[-2]
+            yield f'{self.name}_count', self.labels, key, counts[-2]
+            yield f'{self.name}_sum', self.labels, key, counts[-1]
+
+
+class Registry:
+    '''Metrics of this process, rendered in the Prometheus text format'''
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, *args, **kwargs):
+        return self._add(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self._add(Histogram(*args, **kwargs))
+
+    def collector(self, func):
+        '''Register a function returning extra metrics when rendering'''
+        self.collectors.append(func)
+        return func
+
+    def render(self):
+        metrics = list(self.metrics)
+        for collect in self.collectors:
+            metrics.extend(collect())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, values, value in metric.samples():
+                lines.append(
+                    f'{name}{_format_labels(labels, values)} {value}'
+                )
+        return '\n'.join(lines) + '\n'
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+
+registry = Registry()
+
+requests_total = registry.counter(
+    'http_requests_total', 'Requests by view, method and status',
+    labels=('view', 'method', 'status')
+)
+request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Time to respond to requests',
+    labels=('view', 'method'), buckets=DURATION_BUCKETS
+)
+request_queries = registry.histogram(
+    'http_request_queries', 'Database queries run per request',
+    labels=('view', 'method'), buckets=QUERY_BUCKETS
+)
+request_db_duration = registry.histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in database queries per request',
+    labels=('view', 'method'), buckets=DURATION_BUCKETS
+)
+request_render_duration = registry.histogram(
+    'http_request_render_duration_seconds',
+    'Time spent serializing response bodies per request',
+    labels=('view', 'method'), buckets=DURATION_BUCKETS
+)
+response_size = registry.histogram(
+    'http_response_size_bytes', 'Size of response bodies',
+    labels=('view', 'method'), buckets=SIZE_BUCKETS
+)
+
+POOL_METRICS = (
+    ('size', Gauge, 'db_pool_connections', 'Connections open'),
+    ('in_use', Gauge, 'db_pool_connections_in_use', 'Connections in use'),
+    ('max_size', Gauge, 'db_pool_max_connections', 'Maximum size'),
+    ('created', Counter, 'db_pool_created_total', 'Connections created'),
+    ('waits', Counter, 'db_pool_waits_total',
+     'Acquires that waited for a connection'),
+    ('wait_time', Counter, 'db_pool_wait_seconds_total',
+     'Time spent waiting for a connection'),
+    ('max_wait', Gauge, 'db_pool_max_wait_seconds',
+     'Longest wait for a connection'),
+    ('timeouts', Counter, 'db_pool_timeouts_total',
+     'Acquires that timed out'),
+)
+
+
+@registry.collector
+def pool_metrics():
+    '''Return the state of the connection pools of this process'''
+    pools = all_pools()
+    if not pools:
+        return []
+
+    metrics = []
+    for field, metric_class, name, documentation in POOL_METRICS:
+        metric = metric_class(name, f'Connection pool: {documentation}',
+                              labels=('database',))
+        for (alias, params), pool in pools.items():
+            metric.inc(pool.stats()[field], database=alias)
+        metrics.append(metric)
+    return metrics
+
+
+class RequestMetrics:
+    '''Costs collected while handling one request
+
+    Costs are added to the enclosing collector too, so that e.g. a
+    benchmark sees the queries of the requests it sends.
+    '''
+    slowest_kept = 5
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.queries = 0
+        self.db_duration = 0.0
+        self.render_duration = 0.0
+        self.slowest_queries = []
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db_duration += duration
+        # Min-heap of the slowest queries, the fastest of them on top
+        item = (duration, self.queries, sql)
+        if len(self.slowest_queries) < self.slowest_kept:
+            heapq.heappush(self.slowest_queries, item)
+        else:
+            heapq.heappushpop(self.slowest_queries, item)
+        if self.parent is not None:
+            self.parent.add_query(sql, duration)
+
+    def add_render(self, duration):
+        self.render_duration += duration
+        if self.parent is not None:
+            self.parent.add_render(duration)
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+@contextmanager
+def collect():
+    '''Collect the costs of the code run in this context'''
+    metrics = RequestMetrics(parent=_current.get())
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def record_queries(execute, sql, params, many, context):
+    '''Execute wrapper adding queries to the metrics being collected'''
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - start)
+
+
+@contextmanager
+def measure_render():
+    '''Add the time spent in this context to the render time'''
+    metrics = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.add_render(time.perf_counter() - start)
+
+
+def observe(request, response, metrics, duration):
+    '''Record the metrics of a request and log it when slow'''
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else '<unresolved>'
+    labels = {'view': view, 'method': request.method}
+
+    requests_total.inc(status=response.status_code, **labels)
+    request_duration.observe(duration, **labels)
+    request_queries.observe(metrics.queries, **labels)
+    request_db_duration.observe(metrics.db_duration, **labels)
+    request_render_duration.observe(metrics.render_duration, **labels)
+    if not response.streaming:
+        response_size.observe(len(response.content), **labels)
+
+    threshold = getattr(settings, 'SLOW_REQUEST_SECONDS', None)
+    if threshold is not None and duration >= threshold:
+        slowest = sorted(metrics.slowest_queries, reverse=True)
+        logger.warning(
+            'Slow request %s %s (%s): %.3fs, %d queries in %.3fs, '
+            'render %.3fs%s',
+            request.method, request.get_full_path(), view, duration,
+            metrics.queries, metrics.db_duration, metrics.render_duration,
+            ''.join(
+                f'\n  {query_duration:.3f}s {sql}'
+                for query_duration, number, sql in slowest
+            )
+        )
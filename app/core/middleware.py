@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from core import metrics
+
+
+class MetricsMiddleware:
+    '''Record the duration, queries, render time and size of responses
+
+    Queries are counted by the execute wrapper core.signals installs on
+    every connection, so the queries of views run in other threads, like
+    those of the ASGI thread pool, are counted too. Requests slower than
+    SLOW_REQUEST_SECONDS are logged with their slowest queries.
+
+    Async capable, so that it does not hold a thread while ASGI requests
+    are in flight.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, like MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        with metrics.collect() as collected:
+            response = self.get_response(request)
+        metrics.observe(
+            request, response, collected, time.perf_counter() - start
+        )
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with metrics.collect() as collected:
+            response = await self.get_response(request)
+        metrics.observe(
+            request, response, collected, time.perf_counter() - start
+        )
+        return response
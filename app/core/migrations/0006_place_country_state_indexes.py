@@ -0,0 +1,29 @@
+# Generated by Django 3.1.14 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_place'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(fields=['user', '-name', 'id'], name='core_country_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['user', '-id'], name='core_place_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['user', '-name', 'id'], name='core_place_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='state',
+            index=models.Index(fields=['user', '-name', 'id'], name='core_state_user_name_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+TABLES = ('core_country', 'core_state', 'core_place')
+
+
+def create_trigram_indexes(apps, schema_editor):
+    '''Index names for icontains and istartswith lookups on Postgres'''
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gin')
+    # Django compiles case insensitive lookups to UPPER("name"::text) LIKE,
+    # the index expression must match it to be used
+    for table in TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_name_trgm_idx ON {table} '
+            f'USING gin (user_id, UPPER(name::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for table in TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_place_country_state_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 3.1.14 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+FIELDS = ('country', 'state')
+
+BATCH_SIZE = 1000
+
+
+def fill_summaries(apps, schema_editor):
+    '''Copy the existing links of every place into its summary columns'''
+    Place = apps.get_model('core', 'Place')
+    db = schema_editor.connection.alias
+    place_ids = list(Place.objects.using(db).order_by('id').values_list(
+        'id', flat=True
+    ))
+    for start in range(0, len(place_ids), BATCH_SIZE):
+        chunk = place_ids[start:start + BATCH_SIZE]
+        places = {pk: Place(pk=pk) for pk in chunk}
+        for field in FIELDS:
+            for place in places.values():
+                setattr(place, f'{field}_ids', [])
+                setattr(place, f'{field}_names', [])
+            rows = getattr(Place, field).through.objects.using(db).filter(
+                place_id__in=chunk
+            ).order_by('place_id', f'{field}_id').values_list(
+                'place_id', f'{field}_id', f'{field}__name'
+            )
+            for place_id, related_id, name in rows:
+                getattr(places[place_id], f'{field}_ids').append(related_id)
+                getattr(places[place_id], f'{field}_names').append(name)
+
+        Place.objects.using(db).bulk_update(places.values(), [
+            f'{field}_{suffix}' for field in FIELDS
+            for suffix in ('ids', 'names')
+        ])
+
+
+def create_summary_indexes(apps, schema_editor):
+    '''Index the id arrays for containment lookups on Postgres'''
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for field in FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS core_place_{field}_ids_idx '
+            f'ON core_place USING gin ({field}_ids jsonb_path_ops)'
+        )
+
+
+def drop_summary_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for field in FIELDS:
+        schema_editor.execute(
+            f'DROP INDEX IF EXISTS core_place_{field}_ids_idx'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='country_ids',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='country_names',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='state_ids',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='state_names',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+        migrations.RunPython(create_summary_indexes, drop_summary_indexes),
+    ]
@@ -54,6 +54,13 @@ class Country(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        # Matches the per-user listing ordered by name
+        indexes = [
+            models.Index(fields=['user', '-name', 'id'],
+                         name='core_country_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -64,6 +71,12 @@ class State(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-name', 'id'],
+                         name='core_state_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -77,6 +90,20 @@ class Place(models.Model):
     name = models.CharField(max_length=255)
     state = models.ManyToManyField('State')
     country = models.ManyToManyField('Country')
+    # Sorted ids and names of the links, kept up to date by country.summary
+    # so that places can be listed without reading the M2M tables
+    country_ids = models.JSONField(default=list, editable=False)
+    country_names = models.JSONField(default=list, editable=False)
+    state_ids = models.JSONField(default=list, editable=False)
+    state_names = models.JSONField(default=list, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'],
+                         name='core_place_user_id_idx'),
+            models.Index(fields=['user', '-name', 'id'],
+                         name='core_place_user_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -0,0 +1,26 @@
+from django.conf import settings
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from core.json_backends import get_backend
+
+
+class FastJSONParser(JSONParser):
+    '''JSON parser decoding with orjson or ujson when installed'''
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        name, dumps, loads = get_backend()
+        if loads is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            data = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                data = data.decode(encoding)
+            return loads(data)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
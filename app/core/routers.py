@@ -0,0 +1,70 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+@contextmanager
+def read_from(alias):
+    '''Send the reads of the current request or task to a database'''
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+def _pin_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def pin_to_primary(user):
+    '''Read the data of a user from the primary for REPLICA_PIN_SECONDS'''
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+    if user.is_authenticated and seconds > 0:
+        cache.set(_pin_key(user.pk), True, seconds)
+
+
+def is_pinned(user):
+    '''Return whether a user wrote recently enough to need the primary'''
+    return user.is_authenticated and cache.get(_pin_key(user.pk), False)
+
+
+def read_alias(request):
+    '''Return the database the reads of a request should use
+
+    Safe requests go to a random replica unless the user is pinned to the
+    primary after a write, every other request goes to the primary.
+    '''
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    if (not replicas or request.method not in ('GET', 'HEAD', 'OPTIONS')
+            or is_pinned(request.user)):
+        return DEFAULT_DB_ALIAS
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    '''Route reads to the database chosen for the request, writes to the
+    primary, and keep migrations off the replicas'''
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are still saved on the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'DATABASE_REPLICAS', []):
+            return False
+        return None
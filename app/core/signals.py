@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from core.metrics import record_queries
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    '''Close persistent connections the database dropped while idle
+
+    Runs after Django's own check of CONN_MAX_AGE, so a connection kept
+    from an earlier request is tested at most once every
+    DB_HEALTH_CHECK_INTERVAL seconds and reopened on first use if broken,
+    instead of failing the request.
+    '''
+    interval = getattr(settings, 'DB_HEALTH_CHECK_INTERVAL', None)
+    if interval is None:
+        return
+
+    now = time.monotonic()
+    for conn in connections.all():
+        if conn.connection is None or conn.in_atomic_block:
+            continue
+        if now - getattr(conn, 'health_checked_at', 0) < interval:
+            continue
+
+        if not conn.is_usable():
+            conn.close()
+        conn.health_checked_at = now
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    '''Let the metrics middleware see the queries of every connection'''
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
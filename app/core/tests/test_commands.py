@@ -1,9 +1,18 @@
 # Simulate db availability
-from unittest.mock import patch
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import MagicMock, patch
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
 from django.db.utils import OperationalError
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.models import Country, State, Place
+
+from country.importer import GeodataImporter
 
 
 class CommandTests(TestCase):
@@ -23,3 +32,263 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+    def test_bench_indexes(self):
+        '''Test the index benchmark prints plans and rolls back'''
+        out = StringIO()
+        call_command('bench_indexes', rows=20, users=2, stdout=out)
+
+        self.assertIn('country list', out.getvalue())
+        self.assertIn('places in country', out.getvalue())
+        self.assertFalse(Country.objects.exists())
+        self.assertFalse(Place.objects.exists())
+
+    def test_export_places(self):
+        '''Test exporting the places of a user'''
+        user = get_user_model().objects.create_user('ovansa@gmail.com')
+        Place.objects.create(user=user, name='Ipaja')
+        out = StringIO()
+
+        call_command('export_places', 'ovansa@gmail.com', format='csv',
+                     stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'type,id,name,country,state')
+        self.assertTrue(lines[1].startswith('place,'))
+
+    def test_bench_serializers(self):
+        '''Test the serializer benchmark checks both outputs match'''
+        out = StringIO()
+
+        call_command('bench_serializers', rows=20, repeat=1, stdout=out)
+
+        self.assertIn('countries:', out.getvalue())
+        self.assertIn('places:', out.getvalue())
+        self.assertNotIn('identical output: False', out.getvalue())
+        self.assertFalse(Place.objects.exists())
+
+    def test_rebuild_place_summaries(self):
+        '''Test rebuilding the link summaries of places'''
+        user = get_user_model().objects.create_user('ovansa@gmail.com')
+        place = Place.objects.create(user=user, name='Ipaja')
+        place.country.add(Country.objects.create(user=user, name='Chad'))
+        Place.objects.update(country_ids=[], country_names=[])
+        out = StringIO()
+
+        call_command('rebuild_place_summaries', email=user.email, stdout=out)
+
+        place.refresh_from_db()
+        self.assertEqual(place.country_names, ['Chad'])
+        self.assertIn('Rebuilt 1 places', out.getvalue())
+
+    def test_bench_json(self):
+        '''Test the JSON benchmark checks the renderers output matches'''
+        out = StringIO()
+
+        call_command('bench_json', rows=20, repeat=1, stdout=out)
+
+        self.assertIn('json: render', out.getvalue())
+        self.assertNotIn('identical output: False', out.getvalue())
+        self.assertFalse(Place.objects.exists())
+
+
+class ImportGeodataTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('ovansa@gmail.com')
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, content):
+        '''Write an import file and return its path'''
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_import_ndjson(self):
+        '''Test importing records and their links'''
+        path = self.write('geo.ndjson', '\n'.join([
+            '{"type": "country", "id": 1, "name": "Nigeria"}',
+            '{"type": "state", "id": 7, "name": "Lagos"}',
+            '{"type": "place", "id": 3, "name": "Ipaja", '
+            '"country": [1], "state": [7]}',
+        ]))
+        out = StringIO()
+
+        call_command('import_geodata', path, email=self.user.email,
+                     stdout=out)
+
+        place = Place.objects.get(user=self.user, name='Ipaja')
+        self.assertEqual([c.name for c in place.country.all()], ['Nigeria'])
+        self.assertEqual([s.name for s in place.state.all()], ['Lagos'])
+        self.assertEqual(place.country_names, ['Nigeria'])
+        self.assertEqual(place.state_names, ['Lagos'])
+        self.assertIn('rows/s', out.getvalue())
+
+    def test_import_deduplicates_on_name(self):
+        '''Test importing names the user already has reuses them'''
+        country = Country.objects.create(user=self.user, name='Nigeria')
+        path = self.write('countries.csv', 'name\nNigeria\nGhana\nGhana\n')
+
+        call_command('import_geodata', path, email=self.user.email,
+                     type='country', stdout=StringIO())
+        call_command('import_geodata', path, email=self.user.email,
+                     type='country', stdout=StringIO())
+
+        names = Country.objects.filter(user=self.user).values_list(
+            'name', flat=True
+        )
+        self.assertEqual(sorted(names), ['Ghana', 'Nigeria'])
+        self.assertTrue(Country.objects.filter(id=country.id).exists())
+
+    def test_import_round_trips_export(self):
+        '''Test a CSV export can be imported for another user'''
+        source = get_user_model().objects.create_user('ov@gmail.com')
+        place = Place.objects.create(user=source, name='Ipaja')
+        place.country.add(Country.objects.create(user=source, name='Chad'))
+        place.state.add(State.objects.create(user=source, name='Lagos'))
+        path = os.path.join(self.tmpdir.name, 'export.csv')
+        call_command('export_places', source.email, format='csv',
+                     output=path)
+
+        call_command('import_geodata', path, email=self.user.email,
+                     stdout=StringIO())
+        call_command('import_geodata', path, email=self.user.email,
+                     stdout=StringIO())
+
+        imported = Place.objects.get(user=self.user)
+        self.assertEqual([c.name for c in imported.country.all()], ['Chad'])
+        self.assertEqual([s.name for s in imported.state.all()], ['Lagos'])
+
+    def test_import_unknown_link(self):
+        '''Test places linking ids missing from the import fail'''
+        path = self.write('places.ndjson',
+                          '{"type": "place", "name": "Ipaja", "country": [4]}')
+
+        with self.assertRaises(CommandError):
+            call_command('import_geodata', path, email=self.user.email,
+                         stdout=StringIO())
+        self.assertFalse(Place.objects.exists())
+
+    def test_copy_places_sends_every_column(self):
+        '''Test the Postgres COPY of places fills every NOT NULL column'''
+        importer = GeodataImporter(self.user)
+        importer.connection = MagicMock(vendor='postgresql')
+        importer.connection.ops.quote_name = lambda name: name
+        cursor = importer.connection.cursor.return_value.__enter__()
+
+        importer._load_named(Place, [{'name': 'Ipaja'}])
+
+        sql, buffer = cursor.copy_expert.call_args[0]
+        columns = sql[sql.index('(') + 1:sql.index(')')].split(', ')
+        self.assertEqual(sorted(columns), sorted(
+            field.column for field in Place._meta.concrete_fields
+            if not field.primary_key
+        ))
+        self.assertEqual(buffer.getvalue(),
+                         f'Ipaja,{self.user.pk},[],[],[],[]\r\n')
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class BenchApiTests(TransactionTestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.baseline = os.path.join(self.tmpdir.name, 'baseline.json')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def bench(self, **options):
+        out = StringIO()
+        call_command('bench_api', users=2, countries=2, states=2, places=5,
+                     requests=4, concurrency=1, baseline=self.baseline,
+                     stdout=out, **options)
+        return out.getvalue()
+
+    def test_bench_api_baseline(self):
+        '''Test the API benchmark saves and compares to a baseline'''
+        output = self.bench(save_baseline=True)
+
+        with open(self.baseline) as f:
+            baseline = json.load(f)
+        self.assertIn('place-list:', output)
+        self.assertEqual(baseline['place-list']['errors'], 0)
+        self.assertGreater(baseline['place-list']['queries'], 0)
+        self.assertFalse(get_user_model().objects.exists())
+
+        self.assertIn('No regression',
+                      self.bench(scenario=['place-list'], timings=True,
+                                 tolerance=1000))
+
+    def test_bench_api_timings_opt_in(self):
+        '''Test timings are only compared with --timings'''
+        with open(self.baseline, 'w') as f:
+            json.dump({'place-list': {
+                'rps': 1e9, 'p50_ms': 0, 'p95_ms': 0, 'p99_ms': 0,
+                'queries': 100,
+            }}, f)
+
+        self.assertIn('No regression', self.bench(scenario=['place-list']))
+        with self.assertRaisesMessage(CommandError, 'place-list p50_ms'):
+            self.bench(scenario=['place-list'], timings=True)
+
+    def test_bench_api_queries_only_baseline(self):
+        '''Test a baseline of query counts cannot check timings'''
+        with open(self.baseline, 'w') as f:
+            json.dump({'place-list': {'queries': 100}}, f)
+
+        self.assertIn('No regression', self.bench(scenario=['place-list']))
+        with self.assertRaisesMessage(CommandError, 'no timings'):
+            self.bench(scenario=['place-list'], timings=True)
+
+    def test_bench_api_query_regression(self):
+        '''Test the API benchmark fails when queries rise'''
+        with open(self.baseline, 'w') as f:
+            json.dump({'place-list': {
+                'rps': 0, 'p50_ms': 1e6, 'p95_ms': 1e6, 'p99_ms': 1e6,
+                'queries': 0,
+            }}, f)
+
+        with self.assertRaisesMessage(CommandError, 'place-list queries'):
+            self.bench(scenario=['place-list'])
+
+
+class GenerateFixturesTests(TestCase):
+
+    def generate(self, **options):
+        call_command('generate_fixtures', users=3, countries=6, states=9,
+                     places=60, stdout=StringIO(), **options)
+
+    def test_generate_fixtures(self):
+        '''Test generating skewed data with the requested totals'''
+        self.generate()
+
+        self.assertEqual(Country.objects.count(), 6)
+        self.assertEqual(State.objects.count(), 9)
+        self.assertEqual(Place.objects.count(), 60)
+        counts = [
+            Place.objects.filter(user__email=f'fixture{i}@example.com')
+            .count() for i in range(3)
+        ]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertGreater(counts[0], counts[2])
+        self.assertFalse(Place.objects.filter(country=None).exists())
+
+    def test_generate_fixtures_deterministic(self):
+        '''Test the same seed generates the same data again'''
+        self.generate(seed=7)
+        names = list(Place.objects.order_by('id').values_list(
+            'name', 'country__name'
+        ))
+
+        with self.assertRaises(CommandError):
+            self.generate(seed=7)
+        self.generate(seed=7, replace=True)
+
+        self.assertEqual(list(Place.objects.order_by('id').values_list(
+            'name', 'country__name'
+        )), names)
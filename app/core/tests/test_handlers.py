@@ -0,0 +1,155 @@
+import asyncio
+import json
+import threading
+from io import StringIO
+from unittest import mock
+
+from asgiref.testing import ApplicationCommunicator
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TransactionTestCase, \
+    override_settings
+from django.urls import path
+
+from rest_framework.authtoken.models import Token
+
+from core import metrics
+from core.handlers import ThreadPoolASGIHandler
+from core.models import Country, Place
+
+from country.views import ExportView, PlaceViewSet
+
+
+barrier = threading.Barrier(2, timeout=5)
+
+
+def waiting_view(request):
+    '''Return once another request reached the same point'''
+    barrier.wait()
+    return HttpResponse(threading.current_thread().name)
+
+
+waiting_view.run_in_thread_pool = True
+
+urlpatterns = [
+    path('wait/', waiting_view),
+]
+
+
+def http_scope(path, headers=()):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'testserver')] + list(headers),
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+
+
+async def get(path, headers=()):
+    '''Send a GET request to a new handler and return status and body'''
+    communicator = ApplicationCommunicator(
+        ThreadPoolASGIHandler(), http_scope(path, headers)
+    )
+    await communicator.send_input({'type': 'http.request', 'body': b''})
+    start = await communicator.receive_output(timeout=10)
+    body = b''
+    while True:
+        message = await communicator.receive_output(timeout=10)
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    await communicator.wait()
+    return start['status'], body
+
+
+class ThreadPoolASGIHandlerTests(SimpleTestCase):
+
+    def test_marked_views_run_in_thread_pool(self):
+        '''Test marked views are made async and others are left sync'''
+        handler = ThreadPoolASGIHandler()
+
+        marked = handler.make_view_atomic(
+            PlaceViewSet.as_view({'get': 'list'})
+        )
+        unmarked = handler.make_view_atomic(ExportView.as_view())
+
+        self.assertTrue(asyncio.iscoroutinefunction(marked))
+        self.assertFalse(asyncio.iscoroutinefunction(unmarked))
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_requests_run_concurrently(self):
+        '''Test two requests to a marked view are in flight at once'''
+        async def both():
+            return await asyncio.gather(get('/wait/'), get('/wait/'))
+
+        responses = asyncio.run(both())
+
+        self.assertEqual([status for status, body in responses], [200, 200])
+        threads = {body for status, body in responses}
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread().name.encode(), threads)
+
+
+class ThreadPoolASGIPlaceTests(TransactionTestCase):
+
+    def test_list_places(self):
+        '''Test listing places through the ASGI handler'''
+        user = get_user_model().objects.create_user('ovansa@gmail.com')
+        Place.objects.create(user=user, name='Ipaja')
+        token = Token.objects.create(user=user)
+
+        status, body = asyncio.run(get(
+            '/api/country/place/',
+            [(b'authorization', f'Token {token.key}'.encode())]
+        ))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)[0]['name'], 'Ipaja')
+
+    def test_export_streams_through_handler(self):
+        '''Test streamed responses run their queries off the event loop'''
+        user = get_user_model().objects.create_user('ovansa@gmail.com')
+        place = Place.objects.create(user=user, name='Ipaja')
+        place.country.add(Country.objects.create(user=user, name='Chad'))
+        token = Token.objects.create(user=user)
+
+        status, body = asyncio.run(get(
+            '/api/country/export/',
+            [(b'authorization', f'Token {token.key}'.encode())]
+        ))
+
+        self.assertEqual(status, 200)
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([record['name'] for record in records],
+                         ['Chad', 'Ipaja'])
+
+    def test_queries_counted_in_thread_pool(self):
+        '''Test the metrics see the queries run in the thread pool'''
+        user = get_user_model().objects.create_user('ovansa@gmail.com')
+        token = Token.objects.create(user=user)
+        headers = [(b'authorization', f'Token {token.key}'.encode())]
+
+        with mock.patch.object(metrics.request_queries, 'observe') as observe:
+            asyncio.run(get('/api/country/place/', headers))
+
+        queries = observe.call_args[0][0]
+        self.assertGreater(queries, 0)
+
+    def test_bench_asgi(self):
+        '''Test the load test reports both handlers and cleans up'''
+        out = StringIO()
+
+        call_command('bench_asgi', requests=4, concurrency=2, latency=1,
+                     rows=2, stdout=out)
+
+        self.assertIn('wsgi:', out.getvalue())
+        self.assertIn('asgi:', out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
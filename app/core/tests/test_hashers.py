@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+TOKEN_URL = reverse('user:token')
+
+PBKDF2 = 'core.hashers.PBKDF2PasswordHasher'
+PBKDF2_SHA1 = 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher'
+
+
+class PasswordHasherTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def login(self, email, password):
+        '''Request a token and return the response'''
+        return self.client.post(
+            TOKEN_URL, {'email': email, 'password': password}
+        )
+
+    @override_settings(PASSWORD_HASHERS=[PBKDF2],
+                       PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_pbkdf2_iterations_configurable(self):
+        '''Test the PBKDF2 iterations are read from the settings'''
+        user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_rehash_on_login_with_new_cost(self):
+        '''Test logging in upgrades a password hashed with an old cost'''
+        with self.settings(PASSWORD_HASHERS=[PBKDF2],
+                           PASSWORD_PBKDF2_ITERATIONS=1000):
+            user = get_user_model().objects.create_user(
+                'ovansa@gmail.com', 'password'
+            )
+
+        with self.settings(PASSWORD_HASHERS=[PBKDF2],
+                           PASSWORD_PBKDF2_ITERATIONS=2000):
+            res = self.login('ovansa@gmail.com', 'password')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_rehash_on_login_with_new_hasher(self):
+        '''Test logging in moves a password to the preferred hasher'''
+        with self.settings(PASSWORD_HASHERS=[PBKDF2],
+                           PASSWORD_PBKDF2_ITERATIONS=1000):
+            user = get_user_model().objects.create_user(
+                'ovansa@gmail.com', 'password'
+            )
+
+        with self.settings(PASSWORD_HASHERS=[PBKDF2_SHA1, PBKDF2]):
+            res = self.login('ovansa@gmail.com', 'password')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha1$'))
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_bench_login(self):
+        '''Test the login benchmark reports each hasher'''
+        out = StringIO()
+
+        call_command('bench_login', requests=2, hasher=['pbkdf2'],
+                     stdout=out)
+
+        self.assertIn('pbkdf2:', out.getvalue())
+        self.assertIn('tokens/s', out.getvalue())
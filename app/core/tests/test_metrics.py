@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import Place
+
+
+METRICS_URL = reverse('metrics')
+PLACE_URL = reverse('country:place-list')
+
+
+def sample_value(metric, name, **labels):
+    '''Return the value of a sample of a metric'''
+    for sample_name, names, values, value in metric.samples():
+        if sample_name == name and dict(zip(names, values)) == labels:
+            return value
+    return 0
+
+
+class RegistryTests(SimpleTestCase):
+
+    def test_render_histogram(self):
+        '''Test histograms are rendered in the Prometheus text format'''
+        registry = metrics.Registry()
+        histogram = registry.histogram(
+            'size', 'Sizes', labels=('view',), buckets=(1, 10)
+        )
+        histogram.observe(5, view='a"b')
+        histogram.observe(50, view='a"b')
+
+        self.assertEqual(registry.render(), '\n'.join([
+            '# HELP size Sizes',
+            '# TYPE size histogram',
+            'size_bucket{view="a\\"b",le="1"} 0',
+            'size_bucket{view="a\\"b",le="10"} 1',
+            'size_bucket{view="a\\"b",le="+Inf"} 2',
+            'size_count{view="a\\"b"} 2',
+            'size_sum{view="a\\"b"} 55',
+        ]) + '\n')
+
+
+class MetricsMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('ovansa@gmail.com')
+        self.client.force_authenticate(self.user)
+        Place.objects.create(user=self.user, name='Ipaja')
+        self.labels = {'view': 'country:place-list', 'method': 'GET'}
+
+    def test_request_metrics_recorded(self):
+        '''Test queries, render time and size of a request are recorded'''
+        count = sample_value(metrics.request_queries,
+                             'http_request_queries_count', **self.labels)
+        queries = sample_value(metrics.request_queries,
+                               'http_request_queries_sum', **self.labels)
+
+        res = self.client.get(PLACE_URL)
+
+        self.assertEqual(
+            sample_value(metrics.request_queries,
+                         'http_request_queries_count', **self.labels),
+            count + 1
+        )
+        self.assertGreater(
+            sample_value(metrics.request_queries,
+                         'http_request_queries_sum', **self.labels),
+            queries
+        )
+        self.assertGreater(
+            sample_value(metrics.request_render_duration,
+                         'http_request_render_duration_seconds_sum',
+                         **self.labels),
+            0
+        )
+        self.assertGreaterEqual(
+            sample_value(metrics.response_size,
+                         'http_response_size_bytes_sum', **self.labels),
+            len(res.content)
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        '''Test the metrics are exported in the Prometheus text format'''
+        self.client.get(PLACE_URL)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            'http_request_queries_count{view="country:place-list",'
+            'method="GET"}',
+            res.content.decode()
+        )
+
+    @override_settings(METRICS_TOKEN='secret', METRICS_ALLOWED_IPS=[])
+    def test_metrics_endpoint_rejects_anonymous(self):
+        '''Test the metrics are not served to anonymous clients'''
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer nope')
+        self.assertEqual(res.status_code, 403)
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_metrics_endpoint_allowed_ip(self):
+        '''Test the metrics are served to allowed addresses'''
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='127.0.0.1')
+
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(SLOW_REQUEST_SECONDS=0)
+    def test_slow_request_logged(self):
+        '''Test slow requests are logged with their slowest queries'''
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            self.client.get(PLACE_URL)
+
+        self.assertIn('country:place-list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
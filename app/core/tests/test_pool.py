@@ -0,0 +1,169 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase
+
+from core.backends.pool import ConnectionPool, PoolTimeout
+from core.backends.sqlite3.base import DatabaseWrapper
+
+
+def run_threads(target, count):
+    '''Run a function in several threads at once and wait for them'''
+    threads = [threading.Thread(target=target) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def test_released_connection_reused(self):
+        '''Test a released connection is handed out again'''
+        pool = ConnectionPool()
+        conn = pool.acquire(mock.Mock)
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(mock.Mock), conn)
+        self.assertEqual(pool.stats()['created'], 1)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_max_size_under_concurrent_load(self):
+        '''Test threads wait for a connection once max_size are in use'''
+        pool = ConnectionPool(max_size=3)
+        lock = threading.Lock()
+        in_use = []
+        peak = []
+
+        def work():
+            for i in range(5):
+                conn = pool.acquire(mock.Mock)
+                with lock:
+                    in_use.append(conn)
+                    peak.append(len(in_use))
+                time.sleep(0.001)
+                with lock:
+                    in_use.remove(conn)
+                pool.release(conn)
+
+        run_threads(work, 10)
+
+        stats = pool.stats()
+        self.assertLessEqual(max(peak), 3)
+        self.assertLessEqual(stats['created'], 3)
+        self.assertEqual(stats['acquired'], 50)
+        self.assertEqual(stats['in_use'], 0)
+        self.assertGreater(stats['waits'], 0)
+        self.assertGreater(stats['wait_time'], 0)
+
+    def test_acquire_timeout(self):
+        '''Test acquiring fails once acquire_timeout is over'''
+        pool = ConnectionPool(max_size=1, acquire_timeout=0.01)
+        pool.acquire(mock.Mock)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(mock.Mock)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    @mock.patch('core.backends.pool.time.monotonic', return_value=1000)
+    def test_idle_timeout(self, monotonic):
+        '''Test idle connections expire but min_size are kept'''
+        pool = ConnectionPool(min_size=1, idle_timeout=60)
+        conns = [pool.acquire(mock.Mock) for i in range(3)]
+        for conn in conns:
+            pool.release(conn)
+
+        monotonic.return_value = 1061
+        pool.acquire(mock.Mock)
+
+        self.assertEqual(pool.stats()['size'], 1)
+        self.assertEqual(pool.stats()['closed'], 2)
+        conns[0].close.assert_called_once_with()
+        conns[2].close.assert_not_called()
+
+    def test_discard_and_failed_connect_free_slots(self):
+        '''Test discarded connections and failed connects free their slot'''
+        pool = ConnectionPool(max_size=1, acquire_timeout=0)
+        conn = pool.acquire(mock.Mock)
+        pool.release(conn, discard=True)
+
+        with self.assertRaises(RuntimeError):
+            pool.acquire(mock.Mock(side_effect=RuntimeError))
+
+        conn.close.assert_called_once_with()
+        self.assertIsNot(pool.acquire(mock.Mock), conn)
+
+
+class PooledBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.settings = {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': os.path.join(self.tmpdir.name, 'db.sqlite3'),
+            'POOL': {'MAX_SIZE': 4, 'ACQUIRE_TIMEOUT': 5},
+            'ATOMIC_REQUESTS': False,
+            'AUTOCOMMIT': True,
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {},
+            'TIME_ZONE': None,
+            'USER': '',
+            'PASSWORD': '',
+            'HOST': '',
+            'PORT': '',
+            'TEST': {},
+        }
+
+    def tearDown(self):
+        DatabaseWrapper(self.settings, 'pooled').pool.close_idle()
+        self.tmpdir.cleanup()
+
+    def execute(self, sql, params=()):
+        conn = DatabaseWrapper(self.settings, 'pooled')
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def test_concurrent_queries(self):
+        '''Test many threads share the connections of the pool'''
+        self.execute('CREATE TABLE hit (id INTEGER PRIMARY KEY)')
+
+        def work():
+            for i in range(10):
+                self.execute('INSERT INTO hit DEFAULT VALUES')
+
+        run_threads(work, 16)
+
+        stats = DatabaseWrapper(self.settings, 'pooled').pool.stats()
+        self.assertEqual(self.execute('SELECT COUNT(*) FROM hit'), [(160,)])
+        self.assertLessEqual(stats['created'], 4)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_uncommitted_work_rolled_back(self):
+        '''Test a connection goes back to the pool without its transaction'''
+        self.execute('CREATE TABLE hit (id INTEGER PRIMARY KEY)')
+        conn = DatabaseWrapper(self.settings, 'pooled')
+        conn.set_autocommit(False)
+        with conn.cursor() as cursor:
+            cursor.execute('INSERT INTO hit DEFAULT VALUES')
+        conn.close()
+
+        self.assertEqual(self.execute('SELECT COUNT(*) FROM hit'), [(0,)])
+        self.assertEqual(conn.pool.stats()['created'], 1)
+
+    def test_acquire_timeout_is_database_error(self):
+        '''Test a pool timeout is raised as an OperationalError'''
+        self.settings['POOL'] = {'MAX_SIZE': 1, 'ACQUIRE_TIMEOUT': 0}
+        conn = DatabaseWrapper(self.settings, 'pooled')
+        conn.ensure_connection()
+
+        with self.assertRaises(OperationalError):
+            DatabaseWrapper(self.settings, 'pooled').ensure_connection()
+        conn.close()
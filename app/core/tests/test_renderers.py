@@ -0,0 +1,103 @@
+import datetime
+import decimal
+import io
+import uuid
+from unittest import skipUnless
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from core.json_backends import BACKENDS
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+PAYLOAD = ReturnList([
+    {
+        'id': 1,
+        'name': 'Ìbàdàn / Ọ̀yọ́ \u2028\u2029 "quoted"',
+        'country': [{'id': 2, 'name': 'Nigeria'}],
+        'state': [],
+        'created': datetime.datetime(
+            2020, 6, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+        ),
+        'day': datetime.date(2020, 6, 1),
+        'area': decimal.Decimal('12.5'),
+        'uuid': uuid.UUID(int=1),
+        'detail': _('Not found.'),
+        'ids': (1, 2),
+        3: None,
+    },
+], serializer=None)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def assertSameAsDRF(self, data, media_type=None, context=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type, context),
+            JSONRenderer().render(data, media_type, context)
+        )
+
+    def test_render_matches_drf_renderer(self):
+        '''Test every backend renders the same bytes as the DRF renderer'''
+        for name in list(BACKENDS) + ['json']:
+            with self.subTest(backend=name), \
+                    override_settings(JSON_BACKEND=name):
+                self.assertSameAsDRF(PAYLOAD)
+                self.assertSameAsDRF(PAYLOAD[0])
+                self.assertSameAsDRF(None)
+
+    def test_render_big_integer(self):
+        '''Test integers over 64 bits are rendered like the DRF renderer'''
+        for name in list(BACKENDS) + ['json']:
+            with self.subTest(backend=name), \
+                    override_settings(JSON_BACKEND=name):
+                self.assertSameAsDRF({'id': 2 ** 70})
+
+    def test_render_indented(self):
+        '''Test indented output is left to the DRF renderer'''
+        self.assertSameAsDRF(PAYLOAD, 'application/json; indent=2')
+        self.assertSameAsDRF(PAYLOAD, None, {'indent': 4})
+
+    @skipUnless('orjson' in BACKENDS, 'orjson is not installed')
+    @override_settings(JSON_BACKEND='orjson')
+    def test_render_unsupported_type(self):
+        '''Test unsupported types raise like the DRF renderer'''
+        with self.assertRaises(TypeError):
+            FastJSONRenderer().render({'value': object()})
+
+
+class FastJSONParserTests(SimpleTestCase):
+
+    def parse(self, body, parser_context=None):
+        return FastJSONParser().parse(io.BytesIO(body), None, parser_context)
+
+    def test_parse_matches_drf_parser(self):
+        '''Test every backend parses the same data as the DRF parser'''
+        body = JSONRenderer().render(PAYLOAD[0])
+        expected = JSONParser().parse(io.BytesIO(body))
+
+        for name in list(BACKENDS) + ['json']:
+            with self.subTest(backend=name), \
+                    override_settings(JSON_BACKEND=name):
+                self.assertEqual(self.parse(body), expected)
+                self.assertEqual(
+                    self.parse('{"name": "Ìbàdàn"}'.encode('utf-16'),
+                               {'encoding': 'utf-16'}),
+                    {'name': 'Ìbàdàn'}
+                )
+
+    def test_parse_invalid(self):
+        '''Test invalid JSON and NaN constants are rejected'''
+        for name in list(BACKENDS) + ['json']:
+            with self.subTest(backend=name), \
+                    override_settings(JSON_BACKEND=name):
+                for body in (b'{"name": ', b'{"area": NaN}', b'\xff'):
+                    with self.assertRaises(ParseError):
+                        self.parse(body)
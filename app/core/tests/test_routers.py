@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core import routers
+from core.models import Place
+
+from country.views import PlaceViewSet
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.router = routers.ReplicaRouter()
+        self.user = get_user_model().objects.create_user('ovansa@gmail.com')
+        self.factory = RequestFactory()
+
+    def request(self, method, user=None):
+        request = getattr(self.factory, method)('/api/country/place/')
+        request.user = user or self.user
+        return request
+
+    def test_reads_follow_request_alias(self):
+        '''Test reads use the alias of the request and writes the primary'''
+        self.assertIsNone(self.router.db_for_read(Place))
+
+        with routers.read_from('replica_1'):
+            self.assertEqual(self.router.db_for_read(Place), 'replica_1')
+            self.assertEqual(self.router.db_for_write(Place), 'default')
+
+        self.assertIsNone(self.router.db_for_read(Place))
+
+    def test_no_migrations_on_replicas(self):
+        '''Test migrations only run on the primary'''
+        self.assertFalse(self.router.allow_migrate('replica_1', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+    def test_safe_requests_read_from_replica(self):
+        '''Test safe requests use a replica and others the primary'''
+        self.assertEqual(routers.read_alias(self.request('get')),
+                         'replica_1')
+        self.assertEqual(routers.read_alias(self.request('post')),
+                         'default')
+
+    def test_pinned_user_reads_from_primary(self):
+        '''Test a user reads from the primary after writing'''
+        routers.pin_to_primary(self.user)
+
+        self.assertEqual(routers.read_alias(self.request('get')), 'default')
+        self.assertEqual(
+            routers.read_alias(self.request('get', AnonymousUser())),
+            'replica_1'
+        )
+
+    def test_alias_reset_after_error(self):
+        '''Test a view failing with an error does not leak its alias'''
+        request = APIRequestFactory().get('/api/country/place/')
+        force_authenticate(request, self.user)
+        view = PlaceViewSet.as_view({'get': 'list'})
+
+        with mock.patch.object(PlaceViewSet, 'list',
+                               side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                view(request)
+
+        self.assertIsNone(self.router.db_for_read(Place))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        '''Test everything reads from the primary without replicas'''
+        self.assertEqual(routers.read_alias(self.request('get')), 'default')
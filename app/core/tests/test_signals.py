@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from core.signals import check_connections
+
+
+def sample_connection(usable=True, **attrs):
+    '''Create a mock of an open database connection'''
+    conn = mock.Mock(**{'in_atomic_block': False, **attrs})
+    conn.is_usable.return_value = usable
+    conn.health_checked_at = 0
+    return conn
+
+
+@mock.patch('core.signals.time.monotonic', return_value=1000)
+class CheckConnectionsTests(SimpleTestCase):
+
+    def check(self, *conns):
+        with mock.patch('core.signals.connections') as connections:
+            connections.all.return_value = conns
+            check_connections()
+
+    @override_settings(DB_HEALTH_CHECK_INTERVAL=0)
+    def test_broken_connection_closed(self, monotonic):
+        '''Test a connection that is no longer usable is closed'''
+        broken = sample_connection(usable=False)
+        working = sample_connection()
+
+        self.check(broken, working)
+
+        broken.close.assert_called_once_with()
+        working.close.assert_not_called()
+
+    @override_settings(DB_HEALTH_CHECK_INTERVAL=30)
+    def test_checked_once_per_interval(self, monotonic):
+        '''Test a connection is not checked again within the interval'''
+        conn = sample_connection()
+
+        self.check(conn)
+        monotonic.return_value = 1029
+        self.check(conn)
+        monotonic.return_value = 1030
+        self.check(conn)
+
+        self.assertEqual(conn.is_usable.call_count, 2)
+
+    @override_settings(DB_HEALTH_CHECK_INTERVAL=0)
+    def test_unused_connections_skipped(self, monotonic):
+        '''Test closed connections and open transactions are not checked'''
+        closed = sample_connection(connection=None)
+        in_transaction = sample_connection(in_atomic_block=True)
+
+        self.check(closed, in_transaction)
+
+        closed.is_usable.assert_not_called()
+        in_transaction.is_usable.assert_not_called()
+
+    @override_settings(DB_HEALTH_CHECK_INTERVAL=None)
+    def test_checks_disabled(self, monotonic):
+        '''Test nothing is checked without an interval'''
+        conn = sample_connection(usable=False)
+
+        self.check(conn)
+
+        conn.is_usable.assert_not_called()
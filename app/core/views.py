@@ -0,0 +1,85 @@
+import hmac
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core import metrics, routers
+
+
+def metrics_allowed(request):
+    '''Return whether a request may read the metrics
+
+    Staff users, clients sending `Authorization: Bearer <METRICS_TOKEN>`
+    and addresses listed in METRICS_ALLOWED_IPS are allowed.
+    '''
+    if getattr(request, 'user', None) is not None and request.user.is_staff:
+        return True
+
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        expected = f'Bearer {token}'
+        sent = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(sent.encode(), expected.encode()):
+            return True
+
+    return request.META.get('REMOTE_ADDR') in getattr(
+        settings, 'METRICS_ALLOWED_IPS', ()
+    )
+
+
+def metrics_view(request):
+    '''Return the metrics of this process for Prometheus'''
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        metrics.registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+class ThreadPoolViewMixin:
+    '''Let the ASGI handler run the view in its thread pool
+
+    Only for views keeping no state outside the request and database, which
+    is the case of the DRF generic views.
+    '''
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+        view.run_in_thread_pool = True
+        return view
+
+
+class ReplicaReadMixin:
+    '''Read from a replica on safe requests, see core.routers.read_alias
+
+    Other requests pin the user to the primary for a while so that they
+    read their own writes. The database used is sent in X-DB-Alias.
+    '''
+
+    def dispatch(self, request, *args, **kwargs):
+        # Reset the alias once the request is over, even after errors
+        self._db_context = ExitStack()
+        with self._db_context:
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS:
+            routers.pin_to_primary(request.user)
+
+        self.db_alias = routers.read_alias(request)
+        self._db_context.enter_context(routers.read_from(self.db_alias))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if getattr(self, 'db_alias', None):
+            response['X-DB-Alias'] = self.db_alias
+        return response
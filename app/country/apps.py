@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CountryConfig(AppConfig):
     name = 'country'
+
+    def ready(self):
+        from country import signals  # noqa
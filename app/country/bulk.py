@@ -0,0 +1,56 @@
+from django.db import connections, router, transaction
+
+from core.models import Place
+
+from country import summary
+
+
+def bulk_insert(model, objs, batch_size=1000):
+    '''Insert objects and set their primary keys on every backend'''
+    objs = list(objs)
+    connection = connections[router.db_for_write(model)]
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objs, batch_size=batch_size)
+
+    # Backends that cannot return ids from a multi-row insert
+    with transaction.atomic(using=connection.alias):
+        for obj in objs:
+            obj.save(force_insert=True, using=connection.alias)
+
+    return objs
+
+
+def insert_links(field, links, batch_size=1000):
+    '''Insert (place_id, related_id) pairs into a place M2M table
+
+    Pairs that already exist are skipped. Summaries are left to the
+    caller, see link_places.
+    '''
+    through = getattr(Place, field).through
+    through.objects.bulk_create([
+        through(**{'place_id': place_id, f'{field}_id': related_id})
+        for place_id, related_id in links
+    ], batch_size=batch_size, ignore_conflicts=True)
+
+
+def link_places(field, links, batch_size=1000):
+    '''Insert (place_id, related_id) pairs into a place M2M table
+
+    The summary columns of the linked places are refreshed afterwards.
+    '''
+    links = list(links)
+    insert_links(field, links, batch_size=batch_size)
+    summary.refresh_places(field, [place_id for place_id, pk in links],
+                           batch_size=batch_size)
+
+
+def replace_place_links(field, place_ids, links, batch_size=1000):
+    '''Replace the links of places by (place_id, related_id) pairs'''
+    place_ids, links = set(place_ids), list(links)
+    through = getattr(Place, field).through
+    through.objects.filter(place_id__in=place_ids).delete()
+    link_places(field, links, batch_size=batch_size)
+
+    # Places left without links are not refreshed by link_places
+    unlinked = place_ids - {place_id for place_id, pk in links}
+    summary.refresh_places(field, unlinked, batch_size=batch_size)
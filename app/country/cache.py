@@ -0,0 +1,70 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_cache():
+    '''Return the cache backing the country app responses'''
+    return caches[getattr(settings, 'COUNTRY_CACHE_ALIAS', 'default')]
+
+
+def _version_key(user_id):
+    return f'country:version:{user_id}'
+
+
+def _initial_version():
+    # Start from the clock so a counter that was evicted from the cache
+    # never restarts at a value that has already been used
+    return int(time.time() * 1000)
+
+
+def get_version(user_id):
+    '''Return the current data version of a user'''
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key, _initial_version())
+
+    return version
+
+
+def bump_version(user_id):
+    '''Invalidate everything cached for a user
+
+    Inside a transaction the version is bumped again once it commits: a
+    reader running before the commit sees the old rows under the new
+    version, and whatever it caches must not outlive the commit.
+    '''
+    _bump(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(user_id))
+
+
+def _bump(user_id):
+    cache = get_cache()
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def response_key(user_id, name, path):
+    '''Return the cache key of a response for the user's current version'''
+    digest = hashlib.md5(path.encode('utf-8')).hexdigest()
+    return f'country:{name}:{user_id}:{get_version(user_id)}:{digest}'
+
+
+def etag(user_id, request):
+    '''Return a strong validator for a response to the user's request'''
+    value = ':'.join((
+        str(get_version(user_id)),
+        request.get_full_path(),
+        request.accepted_media_type or '',
+    ))
+    return '"%s"' % hashlib.md5(value.encode('utf-8')).hexdigest()
@@ -0,0 +1,65 @@
+import csv
+import json
+
+from core.models import Country, State, Place
+
+
+CHUNK_SIZE = 2000
+
+CSV_FIELDS = ('type', 'id', 'name', 'country', 'state')
+
+
+def iter_records(user, chunk_size=CHUNK_SIZE):
+    '''Yield every country, state and place of a user as plain dicts
+
+    Rows are read with server-side cursors where the backend supports
+    them, and place links come from the summary columns of the places, so
+    memory stays constant whatever the size of the user's data.
+    '''
+    for model in (Country, State):
+        rows = model.objects.filter(user=user).order_by('id').values_list(
+            'id', 'name'
+        ).iterator(chunk_size=chunk_size)
+        kind = model._meta.model_name
+        for pk, name in rows:
+            yield {'type': kind, 'id': pk, 'name': name}
+
+    rows = Place.objects.filter(user=user).order_by('id').values_list(
+        'id', 'name', 'country_ids', 'state_ids'
+    ).iterator(chunk_size=chunk_size)
+    for pk, name, countries, states in rows:
+        yield {
+            'type': 'place',
+            'id': pk,
+            'name': name,
+            'country': countries,
+            'state': states,
+        }
+
+
+def ndjson_lines(records):
+    '''Yield each record as a line of JSON'''
+    for record in records:
+        yield json.dumps(record, separators=(',', ':')) + '\n'
+
+
+def csv_lines(records):
+    '''Yield the records as CSV rows, with linked ids space separated'''
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    yield writer.writerow(CSV_FIELDS)
+    for record in records:
+        yield writer.writerow([
+            record['type'],
+            record['id'],
+            record['name'],
+            ' '.join(str(pk) for pk in record.get('country', [])),
+            ' '.join(str(pk) for pk in record.get('state', [])),
+        ])
+
+
+class _LineBuffer:
+    '''File-like object returning what is written instead of storing it'''
+
+    def write(self, value):
+        return value
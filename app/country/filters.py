@@ -0,0 +1,67 @@
+from django.db import connections
+from django.db.models import Exists, OuterRef, Q
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class NameSearchFilter(BaseFilterBackend):
+    '''Filter objects on a part or the start of their name
+
+    Both lookups are case insensitive. On Postgres they are served by the
+    trigram indexes created in core migration 0007.
+    '''
+    search_param = 'search'
+    prefix_param = 'prefix'
+
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param, '').strip()
+        if search:
+            queryset = queryset.filter(name__icontains=search)
+
+        prefix = request.query_params.get(self.prefix_param, '').strip()
+        if prefix:
+            queryset = queryset.filter(name__istartswith=prefix)
+
+        return queryset
+
+
+class PlaceLinkFilter(BaseFilterBackend):
+    '''Filter places linked to any of comma separated country/state ids
+
+    On Postgres each id is a containment lookup on the summary id arrays,
+    served by their GIN indexes (core migration 0008), so the place table
+    is the only one read. Other backends use an EXISTS subquery on the M2M
+    table, which never duplicates places the way a join on several ids
+    would.
+    '''
+    fields = ('country', 'state')
+
+    def filter_queryset(self, request, queryset, view):
+        for field in self.fields:
+            value = request.query_params.get(field)
+            if not value:
+                continue
+
+            ids = self._parse_ids(field, value)
+            if ids and connections[queryset.db].vendor == 'postgresql':
+                condition = Q()
+                for pk in ids:
+                    condition |= Q(**{f'{field}_ids__contains': [pk]})
+                queryset = queryset.filter(condition)
+                continue
+
+            through = getattr(queryset.model, field).through
+            queryset = queryset.filter(Exists(through.objects.filter(
+                place_id=OuterRef('pk'), **{f'{field}_id__in': ids}
+            )))
+
+        return queryset
+
+    def _parse_ids(self, field, value):
+        try:
+            return [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise ValidationError({
+                field: ['Enter a comma separated list of ids.']
+            })
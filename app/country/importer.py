@@ -0,0 +1,198 @@
+import csv
+import io
+import json
+from collections import Counter
+
+from django.db import connections, router
+
+from core.models import Country, State, Place
+
+from country import summary
+from country.cache import bump_version
+
+
+class GeodataError(ValueError):
+    '''Raised when an import file cannot be loaded'''
+
+
+def read_records(path, default_type=None):
+    '''Yield the records of an NDJSON or CSV file in export format
+
+    CSV files use the export columns (type, id, name, country, state) with
+    space separated linked ids. Only the name column is required, the
+    type of records without one is taken from default_type.
+    '''
+    with open(path, newline='', encoding='utf-8') as source:
+        if path.endswith('.csv'):
+            rows = csv.DictReader(source)
+        else:
+            rows = (json.loads(line) for line in source if line.strip())
+
+        for number, row in enumerate(rows, 1):
+            try:
+                yield _record(row, default_type)
+            except (KeyError, TypeError, ValueError) as exc:
+                raise GeodataError(f'{path}:{number}: invalid record ({exc})')
+
+
+def _record(row, default_type):
+    record = {
+        'type': row.get('type') or default_type,
+        'id': int(row['id']) if row.get('id') not in (None, '') else None,
+        'name': row['name'],
+    }
+    if record['type'] not in GeodataImporter.types:
+        raise ValueError(f'unknown type {record["type"]!r}')
+
+    for field in ('country', 'state'):
+        ids = row.get(field) or []
+        if isinstance(ids, str):
+            ids = ids.split()
+        record[field] = [int(pk) for pk in ids]
+
+    return record
+
+
+class GeodataImporter:
+    '''Load countries, states and places of one user in bulk
+
+    Rows are deduplicated on (user, name) against the database and within
+    the input. Postgres tables are loaded with COPY, other backends with
+    bulk_create. Ids in the input only serve to resolve place links and
+    must refer to records loaded earlier in the same import.
+    '''
+    types = ('country', 'state', 'place')
+
+    def __init__(self, user, batch_size=10000):
+        self.user = user
+        self.batch_size = batch_size
+        self.connection = connections[router.db_for_write(Place)]
+        self.ids = {'country': {}, 'state': {}}
+        self.created = Counter()
+
+    def load(self, records):
+        '''Load an iterable of records, flushing them in batches'''
+        kind, batch = None, []
+        for record in records:
+            if batch and (record['type'] != kind or
+                          len(batch) >= self.batch_size):
+                self._flush(kind, batch)
+                batch = []
+            kind = record['type']
+            batch.append(record)
+
+        if batch:
+            self._flush(kind, batch)
+        bump_version(self.user.pk)
+
+        return self.created
+
+    def _flush(self, kind, records):
+        if kind == 'place':
+            self._load_places(records)
+        else:
+            model = Country if kind == 'country' else State
+            ids = self._load_named(model, records)
+            for record in records:
+                if record['id'] is not None:
+                    self.ids[kind][record['id']] = ids[record['name']]
+
+    def _load_named(self, model, records):
+        '''Insert the missing names and return the id of every name'''
+        names = list(dict.fromkeys(record['name'] for record in records))
+        ids = self._existing(model, names)
+        new = [name for name in names if name not in ids]
+        if new:
+            self._insert(model, *self._named_rows(model, new))
+            ids.update(self._existing(model, new))
+        self.created[model._meta.model_name] += len(new)
+
+        return ids
+
+    def _named_rows(self, model, names):
+        '''Return the fields and rows inserting some names of the user
+
+        The summary columns of places have no database default, so COPY
+        must send them too. They start empty and are refreshed once the
+        links are loaded.
+        '''
+        fields = ('name', 'user_id')
+        if model is Place:
+            fields += tuple(column for field in summary.FIELDS
+                            for column in summary.columns(field))
+        rows = [(name, self.user.pk) + tuple([] for field in fields[2:])
+                for name in names]
+
+        return fields, rows
+
+    def _load_places(self, records):
+        existing = self._existing(Place, [r['name'] for r in records])
+        ids = self._load_named(Place, records)
+
+        for field in ('country', 'state'):
+            links = set()
+            for record in records:
+                for pk in record[field]:
+                    try:
+                        related_id = self.ids[field][pk]
+                    except KeyError:
+                        raise GeodataError(
+                            f'Place {record["name"]!r} links unknown '
+                            f'{field} id {pk}'
+                        )
+                    links.add((ids[record['name']], related_id))
+
+            # Places that already existed may have some of the links
+            through = getattr(Place, field).through
+            if existing:
+                links -= set(through.objects.filter(
+                    place_id__in=existing.values()
+                ).values_list('place_id', f'{field}_id'))
+
+            self._insert(through, ('place_id', f'{field}_id'), sorted(links))
+            self.created[f'{field} link'] += len(links)
+            summary.refresh_places(
+                field, sorted({place_id for place_id, pk in links}),
+                batch_size=self.batch_size
+            )
+
+    def _existing(self, model, names):
+        '''Return the lowest id of each name already owned by the user'''
+        ids = {}
+        rows = model.objects.filter(
+            user=self.user, name__in=names
+        ).order_by('id').values_list('name', 'id')
+        for name, pk in rows:
+            ids.setdefault(name, pk)
+
+        return ids
+
+    def _insert(self, model, fields, rows):
+        if not rows:
+            return
+        if self.connection.vendor == 'postgresql':
+            self._copy(model, fields, rows)
+        else:
+            model.objects.bulk_create(
+                [model(**dict(zip(fields, row))) for row in rows],
+                batch_size=self.batch_size
+            )
+
+    def _copy(self, model, fields, rows):
+        '''Stream the rows into the model table with COPY FROM STDIN'''
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [json.dumps(value) if isinstance(value, list) else value
+             for value in row]
+            for row in rows
+        )
+        buffer.seek(0)
+
+        quote = self.connection.ops.quote_name
+        columns = ', '.join(
+            quote(model._meta.get_field(field).column) for field in fields
+        )
+        sql = (f'COPY {quote(model._meta.db_table)} ({columns}) '
+               f'FROM STDIN WITH (FORMAT csv)')
+        with self.connection.cursor() as cursor:
+            cursor.copy_expert(sql, buffer)
@@ -0,0 +1,168 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    '''Paginate on the view ordering using opaque keyset cursors
+
+    Pages are selected with a WHERE clause on the ordering columns instead
+    of an OFFSET, so deep pages cost the same as the first one. The last
+    field of the ordering must be unique to keep the ordering stable.
+    The response body stays a plain list and the cursors are returned in
+    a `Link` header.
+    '''
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 1000
+    ordering = ('-pk',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'ordering', self.ordering))
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self._invert(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            self._check_position(position, queryset.model)
+            queryset = queryset.filter(self._after(position, ordering))
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if reverse:
+            results.reverse()
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = None
+        self.previous_position = None
+        if results and has_next:
+            self.next_position = self._position(results[-1])
+        if results and has_previous:
+            self.previous_position = self._position(results[0])
+
+        return results
+
+    def get_paginated_response(self, data):
+        links = []
+        if self.next_position is not None:
+            url = self.encode_cursor(self.next_position, reverse=False)
+            links.append(f'<{url}>; rel="next"')
+        if self.previous_position is not None:
+            url = self.encode_cursor(self.previous_position, reverse=True)
+            links.append(f'<{url}>; rel="previous"')
+
+        headers = {'Link': ', '.join(links)} if links else None
+        return Response(data, headers=headers)
+
+    def get_page_size(self, request):
+        '''Return the requested page size, capped at max_page_size'''
+        page_size = self.page_size or 100
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        if requested <= 0:
+            return page_size
+
+        return min(requested, self.max_page_size)
+
+    def decode_cursor(self, request):
+        '''Return the (position, reverse) pair encoded in the request'''
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode('ascii'))
+            cursor = json.loads(decoded.decode('utf-8'))
+            position = cursor['p']
+            reverse = bool(cursor.get('r', False))
+        except (UnicodeError, binascii.Error, ValueError, KeyError,
+                TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or \
+                len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        '''Return the url for the page starting after the position'''
+        cursor = {'p': position}
+        if reverse:
+            cursor['r'] = 1
+        data = json.dumps(cursor, separators=(',', ':')).encode('utf-8')
+        encoded = base64.urlsafe_b64encode(data).decode('ascii')
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def _position(self, item):
+        '''Return the ordering values of an item'''
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if isinstance(item, dict):
+                values.append(item[name])
+            else:
+                values.append(getattr(item, name))
+
+        return values
+
+    def _check_position(self, position, model):
+        '''Reject cursor values of the wrong type for their ordering field'''
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            model_field = model._meta.pk if name == 'pk' \
+                else model._meta.get_field(name)
+
+            if isinstance(model_field, models.IntegerField):
+                valid = isinstance(value, int) and \
+                    not isinstance(value, bool)
+            elif isinstance(model_field, (models.CharField,
+                                          models.TextField)):
+                valid = isinstance(value, str)
+            else:
+                try:
+                    valid = model_field.to_python(value) is not None
+                except (ValidationError, TypeError):
+                    valid = False
+            if not valid:
+                raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, position, ordering):
+        '''Build the filter selecting rows that sort after the position'''
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        return condition
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
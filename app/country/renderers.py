@@ -0,0 +1,22 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    '''Renderer selecting newline delimited JSON exports'''
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Exports are streamed by the view, only errors are rendered here
+        if data is None:
+            return b''
+        return json.dumps(data).encode('utf-8') + b'\n'
+
+
+class CSVRenderer(NDJSONRenderer):
+    '''Renderer selecting CSV exports'''
+    media_type = 'text/csv'
+    format = 'csv'
@@ -1,9 +1,38 @@
+from django.db import transaction
+from django.db.models import CharField, Value
+
 from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+from rest_framework.utils import html
+from rest_framework.utils.serializer_helpers import ReturnList
 
 from core.models import Country, State, Place
 
+from country import summary
+from country.bulk import (
+    bulk_insert, insert_links, link_places, replace_place_links
+)
+
+
+DOES_NOT_EXIST = 'Invalid pk "{pk_value}" - object does not exist.'
+
+LINK_MODELS = (('country', Country), ('state', State))
+
+
+class DynamicFieldsMixin:
+    '''Serialize only the fields passed in the `fields` argument'''
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
 
-class CountrySerializer(serializers.ModelSerializer):
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CountrySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     '''Serializer for countries objects'''
 
     class Meta:
@@ -12,7 +41,7 @@ class CountrySerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class StateSerializer(serializers.ModelSerializer):
+class StateSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     '''Serializer for state objects'''
 
     class Meta:
@@ -21,23 +50,400 @@ class StateSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class PlaceSerializer(serializers.ModelSerializer):
-    '''Serializer for a place'''
-    country = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Country.objects.all()
-    )
+def owned_links(user, ids):
+    '''Return the {id: name} of the linked ids the user owns, per field
 
-    state = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=State.objects.all()
-    )
+    ids maps link fields to lists of ids, all checked in one query.
+    '''
+    owned = {field: {} for field in ids}
+    queries = [
+        model.objects.filter(user=user, id__in=ids[field]).annotate(
+            link=Value(field, output_field=CharField())
+        ).values_list('link', 'id', 'name')
+        for field, model in LINK_MODELS if ids.get(field)
+    ]
+    if not queries:
+        return owned
+
+    rows = queries[0].union(*queries[1:], all=True) if len(queries) > 1 \
+        else queries[0]
+    for field, pk, name in rows:
+        owned[field][pk] = name
+
+    return owned
+
+
+class PlaceLinksField(serializers.ListField):
+    '''Ids of the countries or states of a place
+
+    Read from the summary columns of the place. The ids are checked and
+    saved by PlaceSerializer.
+    '''
+    child = serializers.IntegerField()
+
+    def get_attribute(self, instance):
+        return getattr(instance, summary.columns(self.field_name)[0])
+
+    def get_value(self, dictionary):
+        value = super().get_value(dictionary)
+        # Like related fields, forms without the field clear the links
+        if value is empty and html.is_html_input(dictionary) and \
+                not getattr(self.root, 'partial', False):
+            return []
+        return value
+
+
+class PlaceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    '''Serializer for a place
+
+    Writes check every linked id in one query and only insert or delete
+    the links that differ from the M2M table.
+    '''
+    country = PlaceLinksField()
+    state = PlaceLinksField()
 
     class Meta:
         model = Place
         fields = ('id', 'name', 'country', 'state')
         read_only_fields = ('id',)
 
+    def validate(self, attrs):
+        '''Replace linked ids by the {id: name} of the user's objects'''
+        links = {
+            field: list(dict.fromkeys(attrs[field]))
+            for field, model in LINK_MODELS if field in attrs
+        }
+        owned = owned_links(self.context['request'].user, links)
+
+        errors = {}
+        for field, ids in links.items():
+            missing = [pk for pk in ids if pk not in owned[field]]
+            if missing:
+                errors[field] = [
+                    DOES_NOT_EXIST.format(pk_value=pk) for pk in missing
+                ]
+            attrs[field] = dict(sorted(owned[field].items()))
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return attrs
+
+    def create(self, validated_data):
+        links = self._pop_links(validated_data)
+        place = Place(**validated_data)
+        self._set_summaries(place, links)
+
+        with transaction.atomic():
+            place.save()
+            for field, names in links.items():
+                insert_links(field, [(place.pk, pk) for pk in names])
+
+        return place
+
+    def update(self, instance, validated_data):
+        links = self._pop_links(validated_data)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        self._set_summaries(instance, links)
+
+        with transaction.atomic():
+            # Diff against the M2M table, the summaries may lag behind it,
+            # holding the place row so concurrent writes apply in turn
+            if links:
+                Place.objects.select_for_update().filter(
+                    pk=instance.pk
+                ).values_list('pk').get()
+            current = {
+                field: set(getattr(Place, field).through.objects.filter(
+                    place_id=instance.pk
+                ).values_list(f'{field}_id', flat=True))
+                for field in links
+            }
+
+            instance.save()
+            for field, names in links.items():
+                removed = current[field] - set(names)
+                if removed:
+                    getattr(Place, field).through.objects.filter(**{
+                        'place_id': instance.pk, f'{field}_id__in': removed
+                    }).delete()
+                insert_links(field, [
+                    (instance.pk, pk) for pk in names
+                    if pk not in current[field]
+                ])
+
+        return instance
+
+    def _pop_links(self, attrs):
+        return {
+            field: attrs.pop(field) for field, model in LINK_MODELS
+            if field in attrs
+        }
+
+    def _set_summaries(self, place, links):
+        for field, names in links.items():
+            ids_column, names_column = summary.columns(field)
+            setattr(place, ids_column, list(names))
+            setattr(place, names_column, list(names.values()))
+
+
+class LinkSummaryField(serializers.Field):
+    '''Read-only list of the {id, name} a place links to for a M2M field
+
+    The links are read from the summary columns of the place, not from
+    the M2M table.
+    '''
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, place):
+        ids, names = summary.columns(self.field_name)
+        return [
+            {'id': pk, 'name': name}
+            for pk, name in zip(getattr(place, ids), getattr(place, names))
+        ]
+
 
 class PlaceDetailSerializer(PlaceSerializer):
     '''Serialize a place detail'''
-    state = StateSerializer(many=True, read_only=True)
-    country = CountrySerializer(many=True, read_only=True)
+    state = LinkSummaryField()
+    country = LinkSummaryField()
+
+
+class ValuesListSerializer:
+    '''Read-only list serializer for values_list(named=True) rows
+
+    Renders the same output as the model serializers of the same fields,
+    without instantiating models or serializer fields per row.
+    '''
+
+    class Meta:
+        fields = ()
+
+    def __init__(self, instance=None, many=True, fields=None, **kwargs):
+        self.instance = instance
+        self.context = kwargs.get('context', {})
+        self.fields = [
+            name for name in self.Meta.fields
+            if fields is None or name in fields
+        ]
+
+    @property
+    def data(self):
+        return ReturnList(self.to_representation(self.instance),
+                          serializer=self)
+
+    def to_representation(self, rows):
+        names = self.fields
+        return [{name: getattr(row, name) for name in names} for row in rows]
+
+
+class CountryValuesListSerializer(ValuesListSerializer):
+    '''Fast list serializer for countries'''
+
+    class Meta:
+        fields = CountrySerializer.Meta.fields
+
+
+class StateValuesListSerializer(ValuesListSerializer):
+    '''Fast list serializer for states'''
+
+    class Meta:
+        fields = StateSerializer.Meta.fields
+
+
+class PlaceValuesListSerializer(ValuesListSerializer):
+    '''Fast list serializer for places, reading their summary columns
+
+    Rows carry the country_ids and state_ids columns in place of the
+    country and state links.
+    '''
+    link_fields = summary.FIELDS
+
+    class Meta:
+        fields = PlaceSerializer.Meta.fields
+
+    def to_representation(self, rows):
+        names = [
+            summary.columns(name)[0] if name in self.link_fields else name
+            for name in self.fields
+        ]
+        return [
+            {
+                name: getattr(row, column)
+                for name, column in zip(self.fields, names)
+            }
+            for row in rows
+        ]
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    '''Validate and save lists of objects with bulk queries'''
+    max_items = 1000
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > self.max_items:
+            message = f'Ensure this list has at most {self.max_items} items.'
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [message]
+            })
+
+        items = super().to_internal_value(data)
+        errors = self.validate_items(items)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return items
+
+    def validate_items(self, items):
+        '''Return the errors of each item, checking ids on update'''
+        errors = [{} for item in items]
+        if self.instance is None:
+            return errors
+
+        known = {obj.pk for obj in self.instance}
+        for item, error in zip(items, errors):
+            if item.get('id') not in known:
+                pk_value = item.get('id')
+                error['id'] = [DOES_NOT_EXIST.format(pk_value=pk_value)]
+
+        return errors
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objs = []
+        for attrs in validated_data:
+            attrs.pop('id', None)
+            objs.append(model(**attrs))
+
+        return bulk_insert(model, objs)
+
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        by_id = {obj.pk: obj for obj in instances}
+        objs, fields = [], set()
+        for attrs in validated_data:
+            obj = by_id[attrs.pop('id')]
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+                fields.add(attr)
+            objs.append(obj)
+
+        if fields:
+            model.objects.bulk_update(objs, fields)
+        # bulk_update() sends no signal for the place summaries to follow
+        if 'name' in fields and model._meta.model_name in summary.FIELDS:
+            summary.rename(model._meta.model_name, objs)
+
+        return objs
+
+
+class PlaceBulkListSerializer(BulkListSerializer):
+    '''Validate and save lists of places and their links'''
+    link_fields = LINK_MODELS
+
+    def validate_items(self, items):
+        '''Check every linked id is owned by the user in one query'''
+        errors = super().validate_items(items)
+        owned = owned_links(self.context['request'].user, {
+            field: list({pk for item in items for pk in item.get(field, [])})
+            for field, model in self.link_fields
+        })
+
+        for field, model in self.link_fields:
+            found = owned[field]
+            for item, error in zip(items, errors):
+                missing = [pk for pk in item.get(field, []) if pk not in found]
+                if missing:
+                    error[field] = [
+                        DOES_NOT_EXIST.format(pk_value=pk) for pk in missing
+                    ]
+
+        return errors
+
+    def create(self, validated_data):
+        links = [self._pop_links(attrs) for attrs in validated_data]
+        places = super().create(validated_data)
+        self._link(places, links)
+
+        return places
+
+    def update(self, instances, validated_data):
+        links = [self._pop_links(attrs) for attrs in validated_data]
+        places = super().update(instances, validated_data)
+
+        # Replace the links of the places that were sent with new ones
+        for field, model in self.link_fields:
+            sent = [
+                (place, place_links)
+                for place, place_links in zip(places, links)
+                if place_links[field] is not None
+            ]
+            if sent:
+                replace_place_links(
+                    field,
+                    [place.pk for place, place_links in sent],
+                    self._pairs(field, *zip(*sent))
+                )
+
+        return places
+
+    def _pop_links(self, attrs):
+        return {
+            field: attrs.pop(field, None) for field, model in self.link_fields
+        }
+
+    def _link(self, places, links):
+        for field, model in self.link_fields:
+            link_places(field, self._pairs(field, places, links))
+
+    def _pairs(self, field, places, links):
+        return [
+            (place.pk, pk)
+            for place, place_links in zip(places, links)
+            for pk in dict.fromkeys(place_links[field] or [])
+        ]
+
+
+class BulkIdsField(serializers.ListField):
+    '''List of object ids sent to the bulk endpoints'''
+    child = serializers.IntegerField()
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', BulkListSerializer.max_items)
+        super().__init__(**kwargs)
+
+
+class CountryBulkSerializer(CountrySerializer):
+    '''Serializer for lists of countries'''
+    id = serializers.IntegerField(required=False)
+
+    class Meta(CountrySerializer.Meta):
+        list_serializer_class = BulkListSerializer
+
+
+class StateBulkSerializer(StateSerializer):
+    '''Serializer for lists of states'''
+    id = serializers.IntegerField(required=False)
+
+    class Meta(StateSerializer.Meta):
+        list_serializer_class = BulkListSerializer
+
+
+class PlaceBulkSerializer(serializers.ModelSerializer):
+    '''Serializer for lists of places'''
+    id = serializers.IntegerField(required=False)
+    country = serializers.ListField(
+        child=serializers.IntegerField(), required=False
+    )
+    state = serializers.ListField(
+        child=serializers.IntegerField(), required=False
+    )
+
+    class Meta:
+        model = Place
+        fields = ('id', 'name', 'country', 'state')
+        list_serializer_class = PlaceBulkListSerializer
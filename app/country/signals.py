@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.db.models.signals import (
+    post_save, pre_delete, post_delete, m2m_changed
+)
+from django.dispatch import receiver
+
+from core.models import Country, State, Place
+
+from country import summary
+from country.cache import bump_version
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=State)
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=State)
+@receiver(post_delete, sender=Place)
+def invalidate_user_cache(sender, instance, **kwargs):
+    '''Bump the owner's cache version when one of their objects changes'''
+    bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Place.country.through)
+@receiver(m2m_changed, sender=Place.state.through)
+def invalidate_place_links(sender, instance, action, **kwargs):
+    '''Bump the owner's cache version when place links change'''
+    if action.startswith('post_'):
+        bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Place.country.through)
+@receiver(m2m_changed, sender=Place.state.through)
+def refresh_place_summaries(sender, instance, action, reverse, model,
+                            pk_set, **kwargs):
+    '''Rewrite the summary columns of the places whose links changed'''
+    if action in ('post_add', 'post_remove') and not pk_set:
+        return
+    if not reverse:
+        if action.startswith('post_'):
+            field = model._meta.model_name
+            ids, names = summary.refresh_places(field, [instance.pk])[
+                instance.pk
+            ]
+            setattr(instance, f'{field}_ids', ids)
+            setattr(instance, f'{field}_names', names)
+        return
+
+    # Links changed from a country or state, pk_set holds place ids
+    field = instance._meta.model_name
+    if action == 'pre_clear':
+        instance._summary_place_ids = _linked_places(field, instance.pk)
+    elif action == 'post_clear':
+        summary.refresh_places(field, instance._summary_place_ids)
+    elif action.startswith('post_'):
+        summary.refresh_places(field, pk_set)
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=State)
+def rename_place_summaries(sender, instance, created, update_fields,
+                           **kwargs):
+    '''Copy a new country or state name to the places linking it'''
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    summary.rename(sender._meta.model_name, [instance])
+
+
+@receiver(pre_delete, sender=Country)
+@receiver(pre_delete, sender=State)
+def find_place_summaries(sender, instance, **kwargs):
+    '''Remember the places linking a country or state being deleted'''
+    if summary.batched():
+        return
+    instance._summary_place_ids = _linked_places(
+        sender._meta.model_name, instance.pk
+    )
+
+
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=State)
+def drop_place_summaries(sender, instance, **kwargs):
+    '''Remove a deleted country or state from the places linking it'''
+    place_ids = getattr(instance, '_summary_place_ids', [])
+    summary.refresh_places(sender._meta.model_name, place_ids)
+
+
+def _linked_places(field, pk):
+    through = getattr(Place, field).through
+    return list(through.objects.filter(
+        **{f'{field}_id': pk}
+    ).values_list('place_id', flat=True))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def start_user_cache(sender, instance, created, **kwargs):
+    '''Give new users a fresh version, some backends reuse ids'''
+    if created:
+        bump_version(instance.pk)
@@ -0,0 +1,21 @@
+from django.db.models import Count
+
+from core.models import Country, State, Place
+
+
+def place_counts(user):
+    '''Return the number of places of a user, overall and per link
+
+    Counts are aggregated by the database over the M2M tables, one row per
+    country or state, so the cost of the response does not grow with the
+    number of places. Countries and states without places are included.
+    '''
+    data = {'places': Place.objects.filter(user=user).count()}
+    for model in (Country, State):
+        data[model._meta.model_name] = list(
+            model.objects.filter(user=user).annotate(
+                places=Count('place')
+            ).order_by('-places', 'id').values('id', 'name', 'places')
+        )
+
+    return data
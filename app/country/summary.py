@@ -0,0 +1,161 @@
+from contextvars import ContextVar
+
+from django.db import router, transaction
+
+from core.models import Place
+
+
+FIELDS = ('country', 'state')
+
+BATCH_SIZE = 1000
+
+_batched = ContextVar('summary_batched', default=False)
+
+
+def columns(field):
+    '''Return the summary columns of a place M2M field'''
+    return (f'{field}_ids', f'{field}_names')
+
+
+def summarize(field, place_ids):
+    '''Return the related ids and names of each place, sorted by id'''
+    summaries = {pk: ([], []) for pk in place_ids}
+    through = getattr(Place, field).through
+    rows = through.objects.filter(place_id__in=place_ids).order_by(
+        'place_id', f'{field}_id'
+    ).values_list('place_id', f'{field}_id', f'{field}__name')
+    for place_id, related_id, name in rows:
+        ids, names = summaries[place_id]
+        ids.append(related_id)
+        names.append(name)
+
+    return summaries
+
+
+def refresh_places(field, place_ids, batch_size=BATCH_SIZE):
+    '''Rewrite the summary of a M2M field from the links of some places
+
+    The places are locked in id order before their links are read, so a
+    concurrent transaction changing their links waits and then reads ours
+    instead of overwriting the summary with its own partial view. Takes
+    one query to lock, one to read the links and one to update the places
+    per batch. Returns the new (ids, names) of each place.
+    '''
+    place_ids = sorted(set(place_ids))
+    ids_column, names_column = columns(field)
+    refreshed = {}
+    if not place_ids:
+        return refreshed
+
+    with transaction.atomic(using=router.db_for_write(Place),
+                            savepoint=False):
+        for start in range(0, len(place_ids), batch_size):
+            chunk = place_ids[start:start + batch_size]
+            _lock(chunk)
+            summaries = summarize(field, chunk)
+            places = []
+            for pk, (ids, names) in summaries.items():
+                places.append(Place(pk=pk, **{
+                    ids_column: ids, names_column: names
+                }))
+            Place.objects.bulk_update(places, columns(field))
+            refreshed.update(summaries)
+
+    return refreshed
+
+
+def batched():
+    '''Return whether summaries are refreshed by a running delete()'''
+    return _batched.get()
+
+
+def delete(queryset):
+    '''Delete countries or states and drop them from the place summaries
+
+    The fast path of the delete signals: the places linked to the deleted
+    rows are found with one query and refreshed in batches afterwards,
+    whatever the number of rows. Other querysets are simply deleted.
+    '''
+    field = queryset.model._meta.model_name
+    if field not in FIELDS:
+        return queryset.delete()
+
+    through = getattr(Place, field).through
+    with transaction.atomic(using=router.db_for_write(queryset.model),
+                            savepoint=False):
+        place_ids = list(through.objects.filter(
+            **{f'{field}_id__in': queryset.values('pk')}
+        ).values_list('place_id', flat=True).distinct())
+        token = _batched.set(True)
+        try:
+            deleted = queryset.delete()
+        finally:
+            _batched.reset(token)
+        refresh_places(field, place_ids)
+
+    return deleted
+
+
+def rename(field, objs):
+    '''Copy the names of renamed countries or states to their places'''
+    names = {obj.pk: obj.name for obj in objs}
+    if not names:
+        return
+
+    ids_column, names_column = columns(field)
+    through = getattr(Place, field).through
+    places = []
+    with transaction.atomic(using=router.db_for_write(Place),
+                            savepoint=False):
+        # Locked in id order like refresh_places, reading the latest arrays
+        rows = Place.objects.select_for_update().filter(
+            id__in=through.objects.filter(
+                **{f'{field}_id__in': names}
+            ).values('place_id')
+        ).order_by('id').only('id', ids_column, names_column)
+        for place in rows:
+            ids = getattr(place, ids_column)
+            new_names = [
+                names.get(pk, name)
+                for pk, name in zip(ids, getattr(place, names_column))
+            ]
+            if new_names != getattr(place, names_column):
+                setattr(place, names_column, new_names)
+                places.append(place)
+
+        if places:
+            Place.objects.bulk_update(places, (names_column,),
+                                      batch_size=BATCH_SIZE)
+
+
+def rebuild(queryset, batch_size=BATCH_SIZE):
+    '''Recompute the summaries of every place of a queryset
+
+    Returns the number of places that were rebuilt.
+    '''
+    rows = queryset.order_by('id').values_list('id', flat=True).iterator(
+        chunk_size=batch_size
+    )
+    count, chunk = 0, []
+    for pk in rows:
+        chunk.append(pk)
+        if len(chunk) >= batch_size:
+            count += _rebuild(chunk, batch_size)
+            chunk = []
+    if chunk:
+        count += _rebuild(chunk, batch_size)
+
+    return count
+
+
+def _rebuild(place_ids, batch_size):
+    for field in FIELDS:
+        refresh_places(field, place_ids, batch_size)
+
+    return len(place_ids)
+
+
+def _lock(place_ids):
+    list(Place.objects.select_for_update().filter(
+        id__in=place_ids
+    ).order_by('id').values_list('id', flat=True))
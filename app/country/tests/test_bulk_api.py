@@ -0,0 +1,181 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Country, State, Place
+
+
+COUNTRY_URL = reverse('country:country-list')
+COUNTRY_BULK_URL = reverse('country:country-bulk')
+STATE_BULK_URL = reverse('country:state-bulk')
+PLACE_BULK_URL = reverse('country:place-bulk')
+
+
+class BulkApiTests(TestCase):
+    '''Test the bulk endpoints of the country app'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_countries(self):
+        '''Test creating a list of countries'''
+        self.client.get(COUNTRY_URL)
+        payload = [{'name': 'Chad'}, {'name': 'Niger'}]
+
+        res = self.client.post(COUNTRY_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['name'] for item in res.data],
+                         ['Chad', 'Niger'])
+        self.assertTrue(all(item['id'] for item in res.data))
+        self.assertEqual(
+            Country.objects.filter(user=self.user).count(), 2
+        )
+        res = self.client.get(COUNTRY_URL)
+        self.assertEqual(len(res.data), 2)
+
+    def test_bulk_create_invalid_reports_items(self):
+        '''Test errors are reported per item and nothing is created'''
+        payload = [{'name': 'Lagos'}, {'name': ''}]
+
+        res = self.client.post(STATE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertFalse(State.objects.exists())
+
+    def test_bulk_create_places_with_links(self):
+        '''Test creating places resolves their links'''
+        chad = Country.objects.create(user=self.user, name='Chad')
+        niger = Country.objects.create(user=self.user, name='Niger')
+        lagos = State.objects.create(user=self.user, name='Lagos')
+        payload = [
+            {'name': 'Ipaja', 'country': [chad.id, niger.id],
+             'state': [lagos.id]},
+            {'name': 'Ikeja'},
+        ]
+
+        res = self.client.post(PLACE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ipaja = Place.objects.get(id=res.data[0]['id'])
+        self.assertEqual(set(ipaja.country.all()), {chad, niger})
+        self.assertEqual(list(ipaja.state.all()), [lagos])
+        self.assertEqual(res.data[1]['country'], [])
+
+    def test_bulk_create_places_checks_ownership(self):
+        '''Test links to missing or foreign objects are rejected'''
+        user2 = get_user_model().objects.create_user(
+            'ov@gmail.com', 'password'
+        )
+        foreign = Country.objects.create(user=user2, name='Ghana')
+        own = Country.objects.create(user=self.user, name='Chad')
+        payload = [
+            {'name': 'Ipaja', 'country': [own.id]},
+            {'name': 'Accra', 'country': [foreign.id]},
+            {'name': 'Ikeja', 'state': [999]},
+        ]
+
+        res = self.client.post(PLACE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('country', res.data[1])
+        self.assertIn('state', res.data[2])
+        self.assertFalse(Place.objects.exists())
+
+    def test_bulk_update_places(self):
+        '''Test updating names and replacing links of places'''
+        chad = Country.objects.create(user=self.user, name='Chad')
+        niger = Country.objects.create(user=self.user, name='Niger')
+        place1 = Place.objects.create(user=self.user, name='Ipaja')
+        place1.country.add(chad)
+        place2 = Place.objects.create(user=self.user, name='Ikeja')
+        place2.country.add(chad)
+        payload = [
+            {'id': place1.id, 'country': [niger.id]},
+            {'id': place2.id, 'name': 'Yaba'},
+        ]
+
+        res = self.client.patch(PLACE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        place1.refresh_from_db()
+        place2.refresh_from_db()
+        self.assertEqual(place1.name, 'Ipaja')
+        self.assertEqual(list(place1.country.all()), [niger])
+        self.assertEqual(place2.name, 'Yaba')
+        self.assertEqual(list(place2.country.all()), [chad])
+
+    def test_bulk_update_unknown_id(self):
+        '''Test updating objects of another user fails'''
+        user2 = get_user_model().objects.create_user(
+            'ov@gmail.com', 'password'
+        )
+        country = Country.objects.create(user=user2, name='Ghana')
+
+        res = self.client.patch(
+            COUNTRY_BULK_URL, [{'id': country.id, 'name': 'Togo'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[0])
+        country.refresh_from_db()
+        self.assertEqual(country.name, 'Ghana')
+
+    def test_bulk_delete(self):
+        '''Test deleting a list of places'''
+        place1 = Place.objects.create(user=self.user, name='Ipaja')
+        place2 = Place.objects.create(user=self.user, name='Ikeja')
+        place3 = Place.objects.create(user=self.user, name='Yaba')
+
+        res = self.client.delete(
+            PLACE_BULK_URL, [place1.id, place2.id], format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Place.objects.all()), [place3])
+
+    def test_bulk_delete_countries_query_count(self):
+        '''Test deleting countries takes constant queries'''
+        Country.objects.bulk_create(
+            Country(user=self.user, name=f'Country {i}') for i in range(20)
+        )
+        countries = list(Country.objects.order_by('id'))
+        place = Place.objects.create(user=self.user, name='Ipaja')
+        place.country.add(*countries[:2], countries[-1])
+
+        # Check the ids, find the linked places, collect and delete the
+        # countries and their links, then lock, read and update the places
+        with self.assertNumQueries(10):
+            res = self.client.delete(
+                COUNTRY_BULK_URL, [country.id for country in countries[1:]],
+                format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        place.refresh_from_db()
+        self.assertEqual(place.country_ids, [countries[0].id])
+        self.assertEqual(place.country_names, ['Country 0'])
+
+    def test_bulk_delete_unknown_id(self):
+        '''Test deleting unknown ids reports them and deletes nothing'''
+        place = Place.objects.create(user=self.user, name='Ipaja')
+
+        res = self.client.delete(
+            PLACE_BULK_URL, [place.id, 999], format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('id', res.data[1])
+        self.assertTrue(Place.objects.exists())
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Country, State, Place
+
+from country import cache
+
+
+COUNTRY_URL = reverse('country:country-list')
+STATE_URL = reverse('country:state-list')
+
+
+class CachedListApiTests(TestCase):
+    '''Test the cached country and state lists'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        '''Test a repeated list does not touch the database'''
+        Country.objects.create(user=self.user, name='Chad')
+        first = self.client.get(COUNTRY_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(COUNTRY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, first.data)
+
+    def test_cache_keyed_by_query(self):
+        '''Test different pages are cached separately'''
+        State.objects.create(user=self.user, name='Lagos')
+        State.objects.create(user=self.user, name='Kano')
+        self.client.get(STATE_URL)
+
+        res = self.client.get(f'{STATE_URL}?page_size=1')
+
+        self.assertEqual(len(res.data), 1)
+        self.assertIn('Link', res)
+
+    def test_create_invalidates_cache(self):
+        '''Test creating through the API invalidates the cached list'''
+        self.client.get(STATE_URL)
+        self.client.post(STATE_URL, {'name': 'Enugu'})
+
+        res = self.client.get(STATE_URL)
+
+        self.assertEqual([item['name'] for item in res.data], ['Enugu'])
+
+    def test_model_changes_invalidate_cache(self):
+        '''Test saving and deleting models invalidates the cached list'''
+        country = Country.objects.create(user=self.user, name='Chad')
+        self.client.get(COUNTRY_URL)
+
+        country.name = 'Niger'
+        country.save()
+        res = self.client.get(COUNTRY_URL)
+        self.assertEqual(res.data[0]['name'], 'Niger')
+
+        country.delete()
+        res = self.client.get(COUNTRY_URL)
+        self.assertEqual(res.data, [])
+
+    def test_place_links_bump_version(self):
+        '''Test changing place links bumps the owner version'''
+        place = Place.objects.create(user=self.user, name='Ipaja')
+        version = cache.get_version(self.user.id)
+
+        place.country.add(Country.objects.create(user=self.user, name='Mali'))
+
+        self.assertGreater(cache.get_version(self.user.id), version)
+
+    def test_cache_limited_to_user(self):
+        '''Test users never see each other's cached lists'''
+        user2 = get_user_model().objects.create_user(
+            'ov@gmail.com', 'password'
+        )
+        Country.objects.create(user=user2, name='Ghana')
+        client2 = APIClient()
+        client2.force_authenticate(user2)
+        client2.get(COUNTRY_URL)
+
+        res = self.client.get(COUNTRY_URL)
+
+        self.assertEqual(res.data, [])
+
+
+class VersionCommitTests(TransactionTestCase):
+    '''Test cache versions around transactions'''
+
+    def test_bump_lands_after_commit(self):
+        '''Test a bump inside a transaction is repeated on commit'''
+        user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+
+        with transaction.atomic():
+            cache.bump_version(user.id)
+            version = cache.get_version(user.id)
+
+        self.assertGreater(cache.get_version(user.id), version)
+
+    def test_rolled_back_bump_not_repeated(self):
+        '''Test a rolled back transaction does not bump on exit'''
+        user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+
+        try:
+            with transaction.atomic():
+                cache.bump_version(user.id)
+                version = cache.get_version(user.id)
+                raise ValueError
+        except ValueError:
+            pass
+
+        self.assertEqual(cache.get_version(user.id), version)
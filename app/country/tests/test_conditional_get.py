@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Country, Place
+
+
+COUNTRY_URL = reverse('country:country-list')
+PLACE_URL = reverse('country:place-list')
+
+
+def detail_url(place_id):
+    '''Return place detail url'''
+    return reverse('country:place-detail', args=[place_id])
+
+
+class ConditionalGetApiTests(TestCase):
+    '''Test ETag validation of the country app endpoints'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_not_modified(self):
+        '''Test a matching ETag returns 304 without querying'''
+        Place.objects.create(user=self.user, name='Ipaja')
+        res = self.client.get(PLACE_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(PLACE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_detail_not_modified(self):
+        '''Test a matching ETag on a detail route returns 304'''
+        place = Place.objects.create(user=self.user, name='Ipaja')
+        res = self.client.get(detail_url(place.id))
+
+        res = self.client.get(
+            detail_url(place.id), HTTP_IF_NONE_MATCH=res['ETag']
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_write_changes_etag(self):
+        '''Test a write makes the previous ETag stale'''
+        res = self.client.get(COUNTRY_URL)
+        etag = res['ETag']
+
+        Country.objects.create(user=self.user, name='Chad')
+        res = self.client.get(COUNTRY_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(len(res.data), 1)
+
+    def test_etag_differs_per_query(self):
+        '''Test different pages get different ETags'''
+        res = self.client.get(COUNTRY_URL)
+        paged = self.client.get(f'{COUNTRY_URL}?page_size=1')
+
+        self.assertNotEqual(res['ETag'], paged['ETag'])
+
+    def test_etag_limited_to_user(self):
+        '''Test another user's ETag does not validate'''
+        user2 = get_user_model().objects.create_user(
+            'ov@gmail.com', 'password'
+        )
+        client2 = APIClient()
+        client2.force_authenticate(user2)
+        etag = client2.get(PLACE_URL)['ETag']
+
+        res = self.client.get(PLACE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class ConditionalGetCommitTests(TransactionTestCase):
+    '''Test ETags around write transactions'''
+
+    def test_detail_etag_changes_on_commit(self):
+        '''Test an ETag served before a write commits is stale after'''
+        client = APIClient()
+        user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+        client.force_authenticate(user)
+        place = Place.objects.create(user=user, name='Ipaja')
+
+        with transaction.atomic():
+            place.name = 'Yaba'
+            place.save()
+            etag = client.get(detail_url(place.id))['ETag']
+
+        res = client.get(detail_url(place.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'Yaba')
@@ -71,6 +71,37 @@ class PrivateClassApiTest(TestCase):
         self.assertEqual(len(res.data), 1)
         self.assertEqual(res.data[0]['name'], country1.name)
 
+    def test_search_countries(self):
+        '''Test filtering countries on part or start of their name'''
+        Country.objects.create(user=self.user, name='Nigeria')
+        Country.objects.create(user=self.user, name='Niger')
+        Country.objects.create(user=self.user, name='Algeria')
+
+        res = self.client.get(COUNTRY_URL, {'search': 'GER'})
+        self.assertEqual([item['name'] for item in res.data],
+                         ['Nigeria', 'Niger', 'Algeria'])
+
+        res = self.client.get(COUNTRY_URL, {'prefix': 'nig'})
+        self.assertEqual([item['name'] for item in res.data],
+                         ['Nigeria', 'Niger'])
+
+        res = self.client.get(COUNTRY_URL, {'search': 'eria', 'prefix': 'a'})
+        self.assertEqual([item['name'] for item in res.data], ['Algeria'])
+
+    def test_countries_sparse_fields(self):
+        '''Test requesting only the country names'''
+        Country.objects.create(user=self.user, name='Chad')
+
+        res = self.client.get(COUNTRY_URL, {'fields': 'name'})
+
+        self.assertEqual(res.data, [{'name': 'Chad'}])
+
+    def test_countries_unknown_field(self):
+        '''Test requesting an unknown field fails'''
+        res = self.client.get(COUNTRY_URL, {'fields': 'name,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_create_country_successful(self):
         '''Test creating a new country'''
         payload = {
@@ -0,0 +1,96 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Country, State, Place
+
+from country import export
+
+
+EXPORT_URL = reverse('country:export')
+
+
+class PublicExportApiTests(TestCase):
+    '''Test unauthenticated export API access'''
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        '''Test that authentication is required'''
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateExportApiTests(TestCase):
+    '''Test the streaming export of a user's places'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+        self.client.force_authenticate(self.user)
+
+        self.country = Country.objects.create(user=self.user, name='Nigeria')
+        self.state = State.objects.create(user=self.user, name='Lagos')
+        self.place = Place.objects.create(user=self.user, name='Ipaja')
+        self.place.country.add(self.country)
+        self.place.state.add(self.state)
+
+    def test_export_ndjson(self):
+        '''Test exporting the place graph as NDJSON'''
+        user2 = get_user_model().objects.create_user(
+            'ov@gmail.com', 'password'
+        )
+        Place.objects.create(user=user2, name='Accra')
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertTrue(res['Content-Type'].startswith('application/x-ndjson'))
+        records = [
+            json.loads(line)
+            for line in b''.join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(records, [
+            {'type': 'country', 'id': self.country.id, 'name': 'Nigeria'},
+            {'type': 'state', 'id': self.state.id, 'name': 'Lagos'},
+            {'type': 'place', 'id': self.place.id, 'name': 'Ipaja',
+             'country': [self.country.id], 'state': [self.state.id]},
+        ])
+
+    def test_export_csv(self):
+        '''Test exporting the place graph as CSV'''
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/csv'))
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'type,id,name,country,state')
+        self.assertEqual(
+            lines[3],
+            f'place,{self.place.id},Ipaja,{self.country.id},{self.state.id}'
+        )
+
+    def test_export_places_in_chunks(self):
+        '''Test places spanning several chunks keep their links'''
+        for i in range(4):
+            place = Place.objects.create(user=self.user, name=f'Place {i}')
+            place.state.add(self.state)
+
+        records = list(export.iter_records(self.user, chunk_size=2))
+
+        places = [record for record in records if record['type'] == 'place']
+        self.assertEqual(len(places), 5)
+        self.assertEqual(places[0]['country'], [self.country.id])
+        self.assertTrue(
+            all(place['state'] == [self.state.id] for place in places)
+        )
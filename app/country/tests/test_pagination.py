@@ -0,0 +1,136 @@
+import base64
+import json
+import re
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Country, Place
+
+from country.pagination import KeysetPagination
+
+
+COUNTRY_URL = reverse('country:country-list')
+PLACE_URL = reverse('country:place-list')
+
+
+def get_link(res, rel):
+    '''Return the url for a relation in the Link header'''
+    match = re.search(f'<([^>]+)>; rel="{rel}"', res.get('Link', ''))
+    return match.group(1) if match else None
+
+
+class KeysetPaginationTests(TestCase):
+    '''Test cursor pagination of the country app endpoints'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_follow_next_links(self):
+        '''Test following next links returns every row once in order'''
+        for name in ['Chad', 'Niger', 'Ghana', 'Togo', 'Mali']:
+            Country.objects.create(user=self.user, name=name)
+
+        names = []
+        url = f'{COUNTRY_URL}?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data), 2)
+            names.extend(item['name'] for item in res.data)
+            url = get_link(res, 'next')
+
+        self.assertEqual(names, ['Togo', 'Niger', 'Mali', 'Ghana', 'Chad'])
+
+    def test_previous_link(self):
+        '''Test the previous link returns the page before the cursor'''
+        for name in ['Chad', 'Niger', 'Ghana', 'Togo']:
+            Country.objects.create(user=self.user, name=name)
+
+        first = self.client.get(f'{COUNTRY_URL}?page_size=2')
+        self.assertIsNone(get_link(first, 'previous'))
+
+        second = self.client.get(get_link(first, 'next'))
+        self.assertIsNone(get_link(second, 'next'))
+
+        res = self.client.get(get_link(second, 'previous'))
+
+        self.assertEqual(res.data, first.data)
+
+    def test_duplicate_names_are_stable(self):
+        '''Test rows sharing a name are paginated by id'''
+        countries = [
+            Country.objects.create(user=self.user, name='Congo')
+            for i in range(3)
+        ]
+
+        ids = []
+        url = f'{COUNTRY_URL}?page_size=1'
+        while url:
+            res = self.client.get(url)
+            ids.extend(item['id'] for item in res.data)
+            url = get_link(res, 'next')
+
+        self.assertEqual(ids, [country.id for country in countries])
+
+    def test_places_paginated_newest_first(self):
+        '''Test places are paginated from the newest'''
+        places = [
+            Place.objects.create(user=self.user, name=f'Place {i}')
+            for i in range(3)
+        ]
+
+        res = self.client.get(f'{PLACE_URL}?page_size=2')
+        self.assertEqual(
+            [item['id'] for item in res.data],
+            [places[2].id, places[1].id]
+        )
+
+        res = self.client.get(get_link(res, 'next'))
+        self.assertEqual([item['id'] for item in res.data], [places[0].id])
+
+    def test_invalid_cursor(self):
+        '''Test an invalid cursor returns not found'''
+        res = self.client.get(f'{COUNTRY_URL}?cursor=invalid')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_values_checked(self):
+        '''Test cursors with values of the wrong type return not found'''
+        cursors = [
+            (PLACE_URL, ['x']),
+            (PLACE_URL, [None]),
+            (PLACE_URL, [{'a': 1}]),
+            (PLACE_URL, [True]),
+            (COUNTRY_URL, [1, 2]),
+            (COUNTRY_URL, ['Chad', 'x']),
+        ]
+        for url, position in cursors:
+            data = json.dumps({'p': position}).encode('utf-8')
+            cursor = base64.urlsafe_b64encode(data).decode('ascii')
+
+            res = self.client.get(url, {'cursor': cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND,
+                             position)
+
+    def test_page_size_capped(self):
+        '''Test the requested page size cannot exceed the maximum'''
+        Country.objects.bulk_create([
+            Country(user=self.user, name=f'Country {i}') for i in range(3)
+        ])
+
+        with patch.object(KeysetPagination, 'max_page_size', 2):
+            res = self.client.get(f'{COUNTRY_URL}?page_size=100')
+
+        self.assertEqual(len(res.data), 2)
+        self.assertIsNotNone(get_link(res, 'next'))
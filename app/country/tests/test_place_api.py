@@ -1,10 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from core import routers
 from core.models import Place, Country, State
 
 from country.serializers import PlaceSerializer, PlaceDetailSerializer
@@ -105,6 +109,131 @@ class PrivateRecipeApiTests(TestCase):
 
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_places_query_count_constant(self):
+        '''Test listing places reads the place table alone'''
+        country = sample_country(user=self.user)
+        state = sample_state(user=self.user)
+        for i in range(10):
+            place = sample_place(user=self.user, name=f'Place {i}')
+            place.country.add(country)
+            place.state.add(state)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(PLACE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 10)
+        self.assertEqual(res.data[0]['country'], [country.id])
+        self.assertEqual(res.data[0]['state'], [state.id])
+
+    def test_list_places_matches_model_serializer(self):
+        '''Test the list output matches the place serializer'''
+        countries = [
+            sample_country(user=self.user, name=name)
+            for name in ('Chad', 'Niger')
+        ]
+        place = sample_place(user=self.user)
+        place.country.add(*countries)
+        place.state.add(sample_state(user=self.user))
+        sample_place(user=self.user, name='Yaba')
+
+        res = self.client.get(PLACE_URL)
+
+        places = Place.objects.filter(user=self.user).order_by('-id')
+        serializer = PlaceSerializer(places, many=True)
+        self.assertEqual(res.data, serializer.data)
+
+    def test_view_place_detail_query_count(self):
+        '''Test viewing a place detail reads its link summaries'''
+        place = sample_place(user=self.user)
+        place.country.add(sample_country(user=self.user, name='Nigeria'))
+        place.country.add(sample_country(user=self.user, name='Ghana'))
+        place.state.add(sample_state(user=self.user))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(place.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['country']), 2)
+
+    def test_search_places(self):
+        '''Test filtering places on their name'''
+        ipaja = sample_place(user=self.user, name='Ipaja')
+        sample_place(user=self.user, name='Ikeja')
+
+        res = self.client.get(PLACE_URL, {'search': 'paj'})
+
+        serializer = PlaceSerializer(ipaja)
+        self.assertEqual(res.data, [serializer.data])
+
+    def test_filter_places_by_country(self):
+        '''Test filtering places on several countries without duplicates'''
+        chad = sample_country(user=self.user, name='Chad')
+        niger = sample_country(user=self.user, name='Niger')
+        place1 = sample_place(user=self.user, name='Ipaja')
+        place1.country.add(chad, niger)
+        place2 = sample_place(user=self.user, name='Ikeja')
+        place2.country.add(niger)
+        sample_place(user=self.user, name='Yaba')
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                PLACE_URL, {'country': f'{chad.id},{niger.id}'}
+            )
+
+        self.assertEqual([item['id'] for item in res.data],
+                         [place2.id, place1.id])
+        sql = queries.captured_queries[0]['sql']
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('DISTINCT', sql)
+
+    def test_filter_places_by_country_and_state(self):
+        '''Test country and state filters must both match'''
+        chad = sample_country(user=self.user)
+        lagos = sample_state(user=self.user)
+        place1 = sample_place(user=self.user, name='Ipaja')
+        place1.country.add(chad)
+        place1.state.add(lagos)
+        place2 = sample_place(user=self.user, name='Ikeja')
+        place2.country.add(chad)
+
+        res = self.client.get(
+            PLACE_URL, {'country': str(chad.id), 'state': str(lagos.id)}
+        )
+
+        self.assertEqual([item['id'] for item in res.data], [place1.id])
+
+    def test_filter_places_invalid_ids(self):
+        '''Test filtering places on invalid ids fails'''
+        res = self.client.get(PLACE_URL, {'state': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_places_sparse_fields(self):
+        '''Test requesting a subset of fields skips unused relations'''
+        place = sample_place(user=self.user)
+        place.country.add(sample_country(user=self.user))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PLACE_URL, {'fields': 'id,name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': place.id, 'name': place.name}])
+        self.assertEqual(len(queries), 1)
+
+    def test_view_place_detail_sparse_fields(self):
+        '''Test requesting a subset of fields of a place detail'''
+        place = sample_place(user=self.user)
+        country = sample_country(user=self.user)
+        place.country.add(country)
+        place.state.add(sample_state(user=self.user))
+
+        res = self.client.get(detail_url(place.id), {'fields': 'country'})
+
+        self.assertEqual(res.data, {
+            'country': [{'id': country.id, 'name': country.name}]
+        })
+
     def test_create_basic_place(self):
         '''Test creating place'''
         payload = {
@@ -137,6 +266,16 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(countries.count(), 1)
         self.assertIn(country1, countries)
 
+    def test_create_place_pins_user_to_primary(self):
+        '''Test writing a place makes the user read from the primary'''
+        cache.clear()
+
+        res = self.client.post(PLACE_URL, {'name': 'Ikeja'})
+
+        self.assertEqual(res['X-DB-Alias'], 'default')
+        self.assertTrue(routers.is_pinned(self.user))
+        self.assertIsNone(routers.ReplicaRouter().db_for_read(Place))
+
     def test_create_place_with_state(self):
         '''Test create place with state'''
         state1 = sample_state(user=self.user, name='Lagos')
@@ -189,3 +328,56 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(place.name, payload['name'])
         countries = place.country.all()
         self.assertEqual(len(countries), 0)
+
+    def test_update_place_links_query_count(self):
+        '''Test updating a place with 100 links takes constant queries'''
+        Country.objects.bulk_create(
+            Country(user=self.user, name=f'Country {i}') for i in range(150)
+        )
+        ids = list(Country.objects.order_by('id').values_list(
+            'id', flat=True
+        ))
+        place = sample_place(user=self.user)
+        place.country.add(*ids[:50])
+
+        # Load the place, check the ids, then in a savepoint lock the place,
+        # read its links, update it, delete and insert the changed links
+        with self.assertNumQueries(9):
+            res = self.client.patch(detail_url(place.id), {
+                'country': ids[25:125]
+            }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['country'], ids[25:125])
+        self.assertEqual(
+            sorted(place.country.values_list('id', flat=True)), ids[25:125]
+        )
+
+    def test_create_place_with_other_users_country(self):
+        '''Test linking a country of another user is rejected'''
+        user2 = get_user_model().objects.create_user('ov@gmail.com')
+        country = sample_country(user=user2)
+
+        res = self.client.post(PLACE_URL, {
+            'name': 'Ipaja', 'country': [country.id], 'state': []
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('country', res.data)
+        self.assertFalse(Place.objects.exists())
+
+    def test_update_place_with_stale_summary(self):
+        '''Test updating links diffs against the M2M table'''
+        country = sample_country(user=self.user)
+        place = sample_place(user=self.user)
+        place.country.add(country)
+        Place.objects.filter(id=place.id).update(country_ids=[])
+
+        res = self.client.patch(detail_url(place.id), {
+            'country': [country.id]
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(place.country.all()), [country])
+        place.refresh_from_db()
+        self.assertEqual(place.country_ids, [country.id])
@@ -64,6 +64,20 @@ class PrivateStateApiTest(TestCase):
         self.assertEqual(len(res.data), 1)
         self.assertEqual(res.data[0]['name'], state.name)
 
+    def test_search_states(self):
+        '''Test filtering states on their name'''
+        user2 = get_user_model().objects.create_user(
+            'ov@gmail.com', 'password'
+        )
+        State.objects.create(user=user2, name='Kano')
+        State.objects.create(user=self.user, name='Kano')
+        State.objects.create(user=self.user, name='Kogi')
+
+        res = self.client.get(STATE_URL, {'prefix': 'ka'})
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]['name'], 'Kano')
+
     def test_create_state_successful(self):
         '''Test states can be created successfully'''
         payload = {'name': 'Enugu'}
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Country, State, Place
+
+
+STATS_URL = reverse('country:stats')
+
+
+class PublicStatsApiTests(TestCase):
+    '''Test unauthenticated stats API access'''
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        '''Test that authentication is required'''
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateStatsApiTests(TestCase):
+    '''Test the place counts of a user'''
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+        self.client.force_authenticate(self.user)
+
+        self.chad = Country.objects.create(user=self.user, name='Chad')
+        self.niger = Country.objects.create(user=self.user, name='Niger')
+        self.lagos = State.objects.create(user=self.user, name='Lagos')
+        for name in ('Ipaja', 'Yaba'):
+            place = Place.objects.create(user=self.user, name=name)
+            place.country.add(self.niger)
+            place.state.add(self.lagos)
+        Place.objects.create(user=self.user, name='Ikeja')
+
+    def test_place_counts(self):
+        '''Test counting places per country and state'''
+        user2 = get_user_model().objects.create_user('ov@gmail.com')
+        place = Place.objects.create(user=user2, name='Accra')
+        place.country.add(Country.objects.create(user=user2, name='Ghana'))
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['places'], 3)
+        self.assertEqual(res.data['country'], [
+            {'id': self.niger.id, 'name': 'Niger', 'places': 2},
+            {'id': self.chad.id, 'name': 'Chad', 'places': 0},
+        ])
+        self.assertEqual(res.data['state'], [
+            {'id': self.lagos.id, 'name': 'Lagos', 'places': 2},
+        ])
+
+    def test_place_counts_cached(self):
+        '''Test the counts are cached until the user's data changes'''
+        self.client.get(STATS_URL)
+
+        with self.assertNumQueries(0):
+            self.client.get(STATS_URL)
+
+        Place.objects.get(name='Ikeja').country.add(self.chad)
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['country'][1]['places'], 1)
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Country, State, Place
+
+from country import summary
+from country.bulk import link_places
+
+
+COUNTRY_BULK_URL = reverse('country:country-bulk')
+PLACE_BULK_URL = reverse('country:place-bulk')
+
+
+class PlaceSummaryTests(TestCase):
+    '''Test the link summary columns of places follow their links'''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'ovansa@gmail.com', 'password'
+        )
+        self.chad = Country.objects.create(user=self.user, name='Chad')
+        self.niger = Country.objects.create(user=self.user, name='Niger')
+        self.place = Place.objects.create(user=self.user, name='Ipaja')
+
+    def summary(self, field='country'):
+        place = Place.objects.get(id=self.place.id)
+        return (getattr(place, f'{field}_ids'),
+                getattr(place, f'{field}_names'))
+
+    def test_add_and_remove_links(self):
+        '''Test adding and removing links updates the summary'''
+        self.place.country.add(self.niger, self.chad)
+        self.assertEqual(self.summary(), (
+            [self.chad.id, self.niger.id], ['Chad', 'Niger']
+        ))
+        self.assertEqual(self.place.country_ids,
+                         [self.chad.id, self.niger.id])
+
+        self.place.country.remove(self.chad)
+        self.assertEqual(self.summary(), ([self.niger.id], ['Niger']))
+
+        self.place.country.clear()
+        self.assertEqual(self.summary(), ([], []))
+
+    def test_reverse_links(self):
+        '''Test changing links from a state updates its places'''
+        state = State.objects.create(user=self.user, name='Lagos')
+        state.place_set.add(self.place)
+        self.assertEqual(self.summary('state'), ([state.id], ['Lagos']))
+
+        state.place_set.clear()
+        self.assertEqual(self.summary('state'), ([], []))
+
+    def test_rename_country(self):
+        '''Test renaming a country renames it in the summaries'''
+        self.place.country.add(self.chad, self.niger)
+
+        self.chad.name = 'Tchad'
+        self.chad.save()
+
+        self.assertEqual(self.summary()[1], ['Tchad', 'Niger'])
+
+    def test_delete_country(self):
+        '''Test deleting a country removes it from the summaries'''
+        self.place.country.add(self.chad, self.niger)
+
+        self.chad.delete()
+
+        self.assertEqual(self.summary(), ([self.niger.id], ['Niger']))
+
+    def test_delete_queryset(self):
+        '''Test deleting states with a queryset updates the summaries'''
+        lagos = State.objects.create(user=self.user, name='Lagos')
+        kano = State.objects.create(user=self.user, name='Kano')
+        self.place.state.add(lagos, kano)
+
+        State.objects.filter(id=lagos.id).delete()
+
+        self.assertEqual(self.summary('state'), ([kano.id], ['Kano']))
+
+    def test_batched_delete(self):
+        '''Test the batched delete removes countries from the summaries'''
+        self.place.country.add(self.chad, self.niger)
+
+        summary.delete(Country.objects.filter(id=self.niger.id))
+
+        self.assertEqual(self.summary(), ([self.chad.id], ['Chad']))
+
+    def test_link_places(self):
+        '''Test bulk linking places refreshes their summaries'''
+        link_places('country', [(self.place.id, self.niger.id)])
+
+        self.assertEqual(self.summary(), ([self.niger.id], ['Niger']))
+
+    def test_bulk_api_updates(self):
+        '''Test bulk renames and link replacements update the summaries'''
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.place.country.add(self.chad)
+
+        client.patch(COUNTRY_BULK_URL, [
+            {'id': self.chad.id, 'name': 'Tchad'},
+        ], format='json')
+        self.assertEqual(self.summary(), ([self.chad.id], ['Tchad']))
+
+        res = client.patch(PLACE_BULK_URL, [
+            {'id': self.place.id, 'country': []},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.summary(), ([], []))
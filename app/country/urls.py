@@ -12,5 +12,7 @@ router.register('place', views.PlaceViewSet)
 app_name = 'country'
 
 urlpatterns = [
+    path('export/', views.ExportView.as_view(), name='export'),
+    path('stats/', views.StatsView.as_view(), name='stats'),
     path('', include(router.urls))
 ]
@@ -1,22 +1,229 @@
-from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from core.models import Country, State, Place
+from core.views import ThreadPoolViewMixin, ReplicaReadMixin
+
+from country import cache, export, serializers, stats, summary
+from country.filters import NameSearchFilter, PlaceLinkFilter
+from country.pagination import KeysetPagination
+from country.renderers import NDJSONRenderer, CSVRenderer
+
+from user.authentication import CachedTokenAuthentication
+
+
+class ConditionalGetMixin:
+    '''Answer matching If-None-Match requests before serializing'''
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        '''Return 304 when the client already has the current response'''
+        etag = cache.etag(request.user.pk, request)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_vary_headers(response, ('Authorization',))
+
+        return response
+
+
+class CachedListMixin:
+    '''Serve list responses from the user's versioned cache'''
+
+    def list(self, request, *args, **kwargs):
+        key = cache.response_key(
+            request.user.pk, self.basename, request.get_full_path()
+        )
+        cached = cache.get_cache().get(key)
+        if cached is not None:
+            data, headers = cached
+            return Response(data, headers=headers)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {}
+            if response.has_header('Link'):
+                headers['Link'] = response['Link']
+            cache.get_cache().set(key, (response.data, headers))
+
+        return response
+
+
+class SparseFieldsMixin:
+    '''Limit list and detail responses to the ?fields= requested'''
+    fields_param = 'fields'
+    sparse_actions = ('list', 'retrieve')
+
+    @cached_property
+    def requested_fields(self):
+        '''Return the requested field names, or None for all fields'''
+        if self.action not in self.sparse_actions:
+            return None
+        value = self.request.query_params.get(self.fields_param)
+        if not value:
+            return None
+
+        fields = [name.strip() for name in value.split(',') if name.strip()]
+        allowed = self.get_serializer_class().Meta.fields
+        unknown = [name for name in fields if name not in allowed]
+        if unknown:
+            raise ValidationError({
+                self.fields_param: [f'Unknown field "{name}".'
+                                    for name in unknown]
+            })
+
+        return fields
+
+    def get_serializer(self, *args, **kwargs):
+        if self.requested_fields is not None:
+            kwargs.setdefault('fields', self.requested_fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def trim_queryset(self, queryset):
+        '''Only load the requested columns and the ordering columns
+
+        List actions read plain values_list() rows, which the viewset's
+        values serializer renders without building model instances.
+        '''
+        if self.action == 'list':
+            return queryset.values_list(*self._columns(queryset), named=True)
+        if self.requested_fields is None:
+            return queryset
+
+        return queryset.only(*self._columns(queryset))
+
+    def _columns(self, queryset):
+        opts = queryset.model._meta
+        fields = self.requested_fields or \
+            self.get_serializer_class().Meta.fields
+        columns = [
+            name for name in fields
+            if opts.get_field(name).concrete and
+            not opts.get_field(name).many_to_many
+        ]
+        columns += [name.lstrip('-') for name in self.ordering]
+
+        return list(dict.fromkeys(columns))
+
+    def wants(self, name):
+        '''Return whether a field is part of the response'''
+        return self.requested_fields is None or name in self.requested_fields
+
+
+class BulkModelMixin:
+    '''Create, update and delete lists of objects in one request'''
+    bulk_serializer_class = None
 
-from country import serializers
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        '''Apply a list payload, reporting errors for each item'''
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
+
+        instances = None
+        if request.method == 'PATCH':
+            instances = list(self.get_queryset().filter(
+                id__in=self._payload_ids(request.data)
+            ))
+
+        serializer = self.bulk_serializer_class(
+            instances,
+            data=request.data,
+            many=True,
+            partial=instances is not None,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            if instances is None:
+                objs = serializer.save(user=request.user)
+            else:
+                objs = serializer.save()
+        cache.bump_version(request.user.pk)
+
+        return Response(
+            self.get_bulk_response_data(objs),
+            status=status.HTTP_201_CREATED if instances is None
+            else status.HTTP_200_OK
+        )
+
+    def bulk_destroy(self, request):
+        '''Delete the objects whose ids are listed in the payload'''
+        ids = serializers.BulkIdsField().run_validation(request.data)
+
+        queryset = self.get_queryset().filter(id__in=ids)
+        found = set(queryset.values_list('id', flat=True))
+        errors = [
+            {} if pk in found
+            else {'id': [serializers.DOES_NOT_EXIST.format(pk_value=pk)]}
+            for pk in ids
+        ]
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            summary.delete(queryset)
+        cache.bump_version(request.user.pk)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_bulk_response_data(self, objs):
+        '''Return the representation of the saved objects'''
+        return self.get_serializer(objs, many=True).data
+
+    def _payload_ids(self, data):
+        if not isinstance(data, list):
+            return []
+        return [
+            item['id'] for item in data
+            if isinstance(item, dict) and isinstance(item.get('id'), int)
+        ]
 
 
 # Re-factor country and state viewsets to BaseCountryAttrViewset
-class BaseCountryAttrViewset(viewsets.GenericViewSet, mixins.ListModelMixin,
+class BaseCountryAttrViewset(ThreadPoolViewMixin, ReplicaReadMixin,
+                             ConditionalGetMixin, CachedListMixin,
+                             SparseFieldsMixin, BulkModelMixin,
+                             viewsets.GenericViewSet, mixins.ListModelMixin,
                              mixins.CreateModelMixin):
     '''Base viewset for user owned country attributes'''
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+    filter_backends = (NameSearchFilter,)
+    ordering = ('-name', 'id')
 
     def get_queryset(self):
         '''Returns objects for the current authenticated user'''
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        return self.trim_queryset(self.queryset.filter(
+            user=self.request.user
+        ).order_by(*self.ordering))
+
+    def get_serializer_class(self):
+        '''Return the fast read-only serializer for lists'''
+        if self.action == 'list':
+            return self.values_serializer_class
+        return self.serializer_class
 
     def perform_create(self, serializer):
         '''Create a new object'''
@@ -27,31 +234,111 @@ class CountryViewSet(BaseCountryAttrViewset):
     '''Manage countries in the database'''
     queryset = Country.objects.all()
     serializer_class = serializers.CountrySerializer
+    values_serializer_class = serializers.CountryValuesListSerializer
+    bulk_serializer_class = serializers.CountryBulkSerializer
 
 
 class StateViewSet(BaseCountryAttrViewset):
     '''Manage states in the database'''
     queryset = State.objects.all()
     serializer_class = serializers.StateSerializer
+    values_serializer_class = serializers.StateValuesListSerializer
+    bulk_serializer_class = serializers.StateBulkSerializer
 
 
-class PlaceViewSet(viewsets.ModelViewSet):
+class PlaceViewSet(ThreadPoolViewMixin, ReplicaReadMixin, ConditionalGetMixin,
+                   SparseFieldsMixin, BulkModelMixin, viewsets.ModelViewSet):
     '''Manage places in database'''
     serializer_class = serializers.PlaceSerializer
+    values_serializer_class = serializers.PlaceValuesListSerializer
+    bulk_serializer_class = serializers.PlaceBulkSerializer
     queryset = Place.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+    filter_backends = (NameSearchFilter, PlaceLinkFilter)
+    ordering = ('-id',)
 
     def get_queryset(self):
-        '''Retrieve places for authenticated user'''
-        return self.queryset.filter(user=self.request.user)
+        '''Retrieve places for authenticated user
+
+        Links are read from the summary columns of the places.
+        '''
+        return self.trim_queryset(self.queryset.filter(
+            user=self.request.user
+        ).order_by(*self.ordering))
+
+    def _columns(self, queryset):
+        columns = super()._columns(queryset)
+        for name in summary.FIELDS:
+            if self.wants(name):
+                ids, names = summary.columns(name)
+                # Lists only render the related ids
+                columns += [ids] if self.action == 'list' else [ids, names]
+
+        return columns
 
     def get_serializer_class(self):
         '''Return appropriate serializer class'''
         if self.action == 'retrieve':
             return serializers.PlaceDetailSerializer
+        if self.action == 'list':
+            return self.values_serializer_class
         return self.serializer_class
 
     def perform_create(self, serializer):
         '''Create a new place'''
         serializer.save(user=self.request.user)
+
+    def get_bulk_response_data(self, objs):
+        '''Return the saved places with their links'''
+        ids = [obj.pk for obj in objs]
+        places = {
+            place.pk: place
+            for place in self.get_queryset().filter(id__in=ids)
+        }
+        return self.get_serializer(
+            [places[pk] for pk in ids], many=True
+        ).data
+
+
+class ExportView(APIView):
+    '''Stream all countries, states and places of the user'''
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+
+    def get(self, request, *args, **kwargs):
+        '''Return the export as NDJSON or CSV depending on the format'''
+        renderer = request.accepted_renderer
+        records = export.iter_records(request.user)
+        if renderer.format == 'csv':
+            lines = export.csv_lines(records)
+        else:
+            lines = export.ndjson_lines(records)
+
+        response = StreamingHttpResponse(
+            lines, content_type=f'{renderer.media_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = \
+            f'attachment; filename="places.{renderer.format}"'
+
+        return response
+
+
+class StatsView(ThreadPoolViewMixin, ReplicaReadMixin, APIView):
+    '''Count the places of the user per country and per state'''
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        '''Return the counts, cached until the user's data changes'''
+        key = cache.response_key(
+            request.user.pk, 'stats', request.get_full_path()
+        )
+        data = cache.get_cache().get(key)
+        if data is None:
+            data = stats.place_counts(request.user)
+            cache.get_cache().set(key, data)
+
+        return Response(data)
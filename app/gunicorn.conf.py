@@ -0,0 +1,62 @@
+"""
+Gunicorn config for production, read from the environment.
+
+Run from this directory with ``gunicorn``. Workers are preforked once the
+app is loaded, each serving GUNICORN_THREADS requests at once; with
+GUNICORN_APP=app.asgi:application and
+GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker they serve the ASGI
+app instead. Pair with DB_CONN_MAX_AGE so workers keep their database
+connections between requests, and with CACHE_BACKEND so that workers
+share the cache.
+
+See https://docs.gunicorn.org/en/stable/settings.html
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = os.environ.get('GUNICORN_APP', 'app.wsgi:application')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+workers = int(os.environ.get(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1
+))
+
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+# Data versions, replica pins and cached responses live in the Django
+# cache, a per process LocMemCache would leave workers serving stale data
+cache_backend = os.environ.get(
+    'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+)
+if workers > 1 and cache_backend.endswith('.LocMemCache'):
+    raise RuntimeError(
+        f'{workers} workers cannot share a LocMemCache, set CACHE_BACKEND '
+        'and CACHE_LOCATION to a shared cache or GUNICORN_WORKERS=1'
+    )
+
+worker_class = os.environ.get(
+    'GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync'
+)
+
+# Seconds an idle client connection is kept open, for clients behind a
+# load balancer keep it above the balancer's idle timeout
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Restart workers after a random number of requests between max_requests
+# and max_requests + max_requests_jitter, so they do not all restart at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Load the app before forking so workers share its memory
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+
+errorlog = '-'
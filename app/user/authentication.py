@@ -0,0 +1,98 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+# Bounded in-process cache, entries expire after TOKEN_CACHE_TIMEOUT seconds
+local_cache = LocMemCache('user-auth-tokens', {
+    'TIMEOUT': getattr(settings, 'TOKEN_CACHE_TIMEOUT', 60),
+    'OPTIONS': {
+        'MAX_ENTRIES': getattr(settings, 'TOKEN_CACHE_MAX_ENTRIES', 10000),
+    },
+})
+
+
+def shared_cache():
+    '''Return the shared token cache if one is configured'''
+    alias = getattr(settings, 'TOKEN_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def _cache_key(key):
+    # Never store raw tokens in cache keys
+    return 'auth:token:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def invalidate_token(key):
+    '''Drop a token from the caches'''
+    cache_key = _cache_key(key)
+    local_cache.delete(cache_key)
+    shared = shared_cache()
+    if shared is not None:
+        shared.delete(cache_key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    '''Token authentication caching resolved tokens and their users
+
+    Tokens are looked up in the in-process cache, then in the optional
+    shared cache named by TOKEN_CACHE_ALIAS, and only then in the database.
+    The shared cache only holds the user id and active flag of a token, never
+    the user row, and a hit there loads the user by primary key. Deleting a
+    token or saving its user invalidates both caches of the current process;
+    other processes see the change once their in-process entry expires.
+    '''
+
+    def authenticate_credentials(self, key):
+        cache_key = _cache_key(key)
+        shared = shared_cache()
+
+        token = local_cache.get(cache_key)
+        if token is None and shared is not None:
+            token = self.from_shared(key, shared.get(cache_key))
+            if token is not None:
+                local_cache.set(cache_key, token)
+
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related('user').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+            local_cache.set(cache_key, token)
+            if shared is not None:
+                shared.set(cache_key, (token.user_id, token.user.is_active))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        return (token.user, token)
+
+    def from_shared(self, key, entry):
+        '''Rebuild a token from a shared (user_id, is_active) entry'''
+        if entry is None:
+            return None
+
+        user_id, is_active = entry
+        if not is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        model = self.get_model()
+        user_model = model._meta.get_field('user').related_model
+        try:
+            user = user_model.objects.get(pk=user_id)
+        except user_model.DoesNotExist:
+            return None
+
+        return model(key=key, user=user)
@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import local_cache, _cache_key
+
+
+ME_URL = reverse('user:me')
+COUNTRY_URL = reverse('country:country-list')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    '''Test token authentication with cached lookups'''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='ovansa@gmail.com',
+            password='password',
+            name='Ovansa Mo',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_token_skips_database(self):
+        '''Test a known token is resolved without a query'''
+        self.client.get(COUNTRY_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(COUNTRY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_invalid_token(self):
+        '''Test an unknown token is rejected'''
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        '''Test deleting a token invalidates its cached entry'''
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        '''Test deactivating a user invalidates their cached tokens'''
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_not_stale(self):
+        '''Test the cached user reflects profile updates'''
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'Ovanses Mo'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'Ovanses Mo')
+
+    def test_update_reloads_cached_user(self):
+        '''Test a profile update never writes back a cached user'''
+        self.client.get(ME_URL)
+        get_user_model().objects.filter(id=self.user.id).update(
+            password='changed'
+        )
+
+        res = self.client.patch(ME_URL, {'name': 'Ovanses Mo'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Ovanses Mo')
+        self.assertEqual(self.user.password, 'changed')
+
+    def test_update_rejects_deactivated_cached_user(self):
+        '''Test a user deactivated elsewhere cannot update their profile'''
+        self.client.get(ME_URL)
+        get_user_model().objects.filter(id=self.user.id).update(
+            is_active=False
+        )
+
+        res = self.client.patch(ME_URL, {'name': 'Ovanses Mo'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.name, 'Ovansa Mo')
+
+    @override_settings(TOKEN_CACHE_ALIAS='default')
+    def test_shared_cache_stores_user_id(self):
+        '''Test the shared cache holds the user id, not the user'''
+        cache.clear()
+        self.client.get(ME_URL)
+
+        entry = cache.get(_cache_key(self.token.key))
+        self.assertEqual(entry, (self.user.id, True))
+
+        local_cache.clear()
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
@@ -1,30 +1,50 @@
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions, generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.views import ThreadPoolViewMixin
+
+from user.authentication import CachedTokenAuthentication
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(ThreadPoolViewMixin, generics.CreateAPIView):
     '''Creates a new user in the system'''
 
     serializer_class = UserSerializer
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(ThreadPoolViewMixin, ObtainAuthToken):
     '''Create a new auth token for user'''
 
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(ThreadPoolViewMixin, generics.RetrieveUpdateAPIView):
     '''Manage the authenticated user'''
 
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = [permissions.IsAuthenticated, ]
 
     def get_object(self):
-        '''Retrieve and return authticated user'''
-        return self.request.user
+        '''Retrieve and return authticated user
+
+        The user of a request may come from the token cache, so writes
+        reload it rather than save a stale copy over newer columns.
+        '''
+        user = self.request.user
+        if self.request.method in permissions.SAFE_METHODS:
+            return user
+
+        user = get_object_or_404(get_user_model(), pk=user.pk)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return user